@@ -1,16 +1,45 @@
 from pydantic_settings import BaseSettings
 import os
 from pathlib import Path
+from typing import List
 
 class Settings(BaseSettings):
     PROJECT_NAME: str = "GitHub API"
     PROJECT_VERSION: str = "0.1.0"
+    # "development" enables auto-reload and access logging; anything else is treated as production
+    ENVIRONMENT: str = "development"
     GOOGLE_API_KEY: str 
     BATCH_SIZE: int = 50
+    # Fetch per-commit file diffs from GitHub; analysis needs them, plain listings don't
+    FETCH_FILE_DIFFS: bool = True
+    # Patches longer than this are truncated; huge diffs (lockfiles, generated code) dominate memory
+    MAX_PATCH_LENGTH: int = 10000
+    COMMIT_CACHE_PATH: str = "commit_cache/commits.sqlite3"
+    COMMIT_CACHE_MAX_ENTRIES: int = 50000
+    # Cap on each patch's length in the embedded subcommit text; 0 embeds whole patches. The model only
+    # reads the first 2048 tokens, so a cap (e.g. 2000) lets later files count, but it changes the
+    # embedded text: rebuild existing embedding collections after changing it
+    EMBEDDING_MAX_PATCH_LENGTH: int = 0
+    EMBEDDING_CACHE_PATH: str = "commit_cache/embeddings.sqlite3"
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 100000
+    ANALYSIS_CACHE_PATH: str = "commit_cache/analyses.sqlite3"
+    ANALYSIS_CACHE_MAX_ENTRIES: int = 50000
+    ANALYSIS_CACHE_TTL_DAYS: int = 30
+    # Maximum number of embedding requests in flight against Gemini
+    EMBEDDING_CONCURRENCY: int = 8
+    # How long a search query waits for other queries to share its embedding request
+    QUERY_BATCH_MAX_WAIT_MS: int = 50
+    # Maximum number of commit analysis requests in flight against Gemini
+    LLM_CONCURRENCY: int = 16
+    # Maximum number of commit detail requests in flight against GitHub
+    GITHUB_CONCURRENCY: int = 16
     GITHUB_ACCESS_TOKEN: str
     SUPABASE_URL: str
     SUPABASE_KEY: str
     API_KEY: str = "CHRONOCODE123"
+    # Origins allowed to call the API from a browser, e.g. '["https://app.example.com"]'; the "*" default
+    # allows any origin in development and disables cross-origin access elsewhere
+    ALLOWED_ORIGINS: List[str] = ["*"]
     retries: int = 3
     OPENAI_API_KEY: str
     # GitHub OAuth settings
@@ -10,7 +10,7 @@ from app.config.settings import settings
 from app.services import commits
 from app.services.commits import AlreadyAnalyzedRepositoryError
 from app.logger.logger import logger
-from app.services.embeddings import get_text_embedding, create_subcommit_text
+from app.services.embeddings import get_text_embedding, get_query_embedding, create_subcommit_text
 from app.services.chromadb_service import collection_exists, insert_document, get_k_neighbors
 from app.models.models_AI import Document
 
@@ -98,7 +98,7 @@ async def analyze_commits(request: CommitAnalysisRequest):
             }
         
         all_analyses: List[SubCommitAnalysis] = []
-        batch_size = settings.BATCH_SIZE if hasattr(settings, 'BATCH_SIZE') else 50
+        batch_size = settings.BATCH_SIZE
         logger.info(f"Using batch size: {batch_size}")
         
         # Create batches
@@ -119,7 +119,7 @@ async def analyze_commits(request: CommitAnalysisRequest):
         # Store all analyses in Supabase
         if all_analyses:
             logger.info("Storing analyses in Supabase")
-            storage_result = store_commit_analyses(all_analyses)
+            storage_result = await asyncio.to_thread(store_commit_analyses, all_analyses)
             
             if "error" in storage_result:
                 logger.error(f"Error storing analyses in Supabase: {storage_result['error']}")
@@ -183,7 +183,7 @@ async def update_analysis(request: UpdateAnalysisRequest):
         logger.info(f"Fetched {len(list_commits)} new commits from repository: {request.repository_url}")
         
         all_analyses: List[SubCommitAnalysis] = []
-        batch_size = settings.BATCH_SIZE if hasattr(settings, 'BATCH_SIZE') else 50
+        batch_size = settings.BATCH_SIZE
         logger.info(f"Using batch size: {batch_size}")
         
         # Create batches
@@ -204,7 +204,7 @@ async def update_analysis(request: UpdateAnalysisRequest):
         # Store all analyses in Supabase
         if all_analyses:
             logger.info("Storing analyses in Supabase")
-            storage_result = store_commit_analyses(all_analyses)
+            storage_result = await asyncio.to_thread(store_commit_analyses, all_analyses)
             
             if "error" in storage_result:
                 logger.error(f"Error storing analyses in Supabase: {storage_result['error']}")
@@ -248,7 +248,7 @@ async def create_embedding_space(request: EmbeddingSpaceRequest):
         logger.info(f"Received request to create embedding space for repository: {request.repository_url}")
         
         # Get all commit analyses for the repository
-        result = get_all_commit_analyses(request.repository_url)
+        result = await asyncio.to_thread(get_all_commit_analyses, request.repository_url)
         
         if "error" in result:
             logger.error(f"Error retrieving commit analyses: {result['error']}")
@@ -279,43 +279,29 @@ async def create_embedding_space(request: EmbeddingSpaceRequest):
         
         logger.info(f"Retrieved {len(analyses)} commit analyses for repository ID: {repo_id}")
         
-        # Process all embeddings concurrently without batching
-        import asyncio
-        
-        async def process_analysis(analysis):
-            # Prepare text for the analysis
-            text = create_subcommit_text(analysis)
-            
-            # Generate embedding for the text
-            embedding = await get_text_embedding([text])
-            
-            if embedding and embedding[0]:
-                # Create document with embedding
-                doc = Document(
-                    vector=embedding,
-                    subcommit_id=analysis.id,
-                    metadata={
-                        "subcommit_id": analysis.id,
-                        "content": f"Title: {analysis.title}\nDescription: {analysis.description}\nIdea: {analysis.idea}",
-                        "id": analysis.id,
-                        "commit_sha": analysis.commit_sha,
-                        "title": analysis.title,
-                        "repo_id": repo_id
-                    },
-                )
-                return doc
-            else:
-                logger.warning(f"Failed to generate embedding for subcommit: {analysis.id}")
-                return None
-        
-        # Create tasks for all analyses at once
-        tasks = [process_analysis(analysis) for analysis in analyses]
-        
-        # Process all analyses concurrently
-        results = await asyncio.gather(*tasks)
-        
-        # Filter out None results
-        documents = [doc for doc in results if doc is not None]
+        # Generate all embeddings in batched requests
+        texts = [create_subcommit_text(analysis) for analysis in analyses]
+        embeddings = await get_text_embedding(texts)
+        
+        if len(embeddings) != len(analyses):
+            logger.error(f"Generated {len(embeddings)} embeddings for {len(analyses)} subcommits")
+            raise HTTPException(status_code=500, detail="Failed to generate embeddings")
+        
+        documents = [
+            Document(
+                vector=embedding,
+                subcommit_id=analysis.id,
+                metadata={
+                    "subcommit_id": analysis.id,
+                    "content": f"Title: {analysis.title}\nDescription: {analysis.description}\nIdea: {analysis.idea}",
+                    "id": analysis.id,
+                    "commit_sha": analysis.commit_sha,
+                    "title": analysis.title,
+                    "repo_id": repo_id
+                },
+            )
+            for analysis, embedding in zip(analyses, embeddings)
+        ]
         
         logger.info(f"Created {len(documents)} documents with embeddings")
         
@@ -359,8 +345,8 @@ async def query_commits(request: QueryCommitsRequest):
         logger.info(f"Received query request for repository: {request.repository_id}")
         
         # Generate embedding for the query
-        query_embedding = await get_text_embedding([request.query])
-        if not query_embedding:
+        query_embedding = await get_query_embedding(request.query)
+        if query_embedding is None:
             logger.error("Failed to generate embedding for query")
             raise HTTPException(status_code=500, detail="Failed to generate embedding for query")
         
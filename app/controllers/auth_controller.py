@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import APIRouter, HTTPException, Request, Response
 from pydantic import BaseModel
 from typing import Optional
@@ -121,7 +122,7 @@ async def api_exchange_code_for_token(request: Request, response: Response):
         raise HTTPException(status_code=400, detail="Authorization code is required")
     
     try:
-        token_data = exchange_code_for_token(code)
+        token_data = await asyncio.to_thread(exchange_code_for_token, code)
         
         if "error" in token_data:
             raise HTTPException(status_code=400, detail=token_data["error"])
@@ -1,3 +1,4 @@
+import asyncio
 from github import Github
 from typing import List, Dict, Any, Optional
 from fastapi import APIRouter, HTTPException, Body, Request, Depends, Response
@@ -15,6 +16,46 @@ router = APIRouter(
     }
 )
 
+def _get_user_info(github: Github) -> Dict[str, Any]:
+    # PyGithub loads lazily and blocks on every attribute access, so this runs in a worker thread
+    user = github.get_user()
+    
+    return {
+        "login": user.login,
+        "id": user.id,
+        "name": user.name,
+        "email": user.email,
+        "avatar_url": user.avatar_url,
+        "html_url": user.html_url,
+        "public_repos": user.public_repos,
+        "followers": user.followers,
+        "following": user.following,
+        "created_at": user.created_at.isoformat() if user.created_at else None,
+        "updated_at": user.updated_at.isoformat() if user.updated_at else None
+    }
+
+def _get_user_repos(github: Github) -> List[Dict[str, Any]]:
+    # PyGithub pages through repositories with blocking requests, so this runs in a worker thread
+    user = github.get_user()
+    
+    # Get repositories
+    repos = []
+    for repo in user.get_repos():
+        repos.append({
+            "id": repo.id,
+            "name": repo.name,
+            "full_name": repo.full_name,
+            "description": repo.description,
+            "html_url": repo.html_url,
+            "language": repo.language,
+            "stargazers_count": repo.stargazers_count,
+            "forks_count": repo.forks_count,
+            "created_at": repo.created_at.isoformat() if repo.created_at else None,
+            "updated_at": repo.updated_at.isoformat() if repo.updated_at else None
+        })
+    
+    return repos
+
 # Handle OPTIONS preflight request for user endpoint
 @router.options("/user")
 async def options_user(response: Response):
@@ -52,7 +93,7 @@ class TimelineRequest(BaseModel):
 async def get_commits_endpoint(repo_url: str, access_token: Optional[str] = None, branch: str = None, path: str = None):
     """Get commits from a GitHub repository."""
     try:
-        commits = get_repository_commits(repo_url, access_token, branch, path)
+        commits = await get_repository_commits(repo_url, access_token, branch, path)
         return {"commits": commits}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -73,12 +114,12 @@ async def create_timeline(request: TimelineRequest = Body(...)):
             raise HTTPException(status_code=400, detail="Invalid date format. Please use ISO format (YYYY-MM-DDTHH:MM:SSZ)")
         
         # Get commits
-        commits = get_repository_commits(repo_url, access_token)
+        commits = await get_repository_commits(repo_url, access_token)
         
         # Filter commits by date
         filtered_commits = [
             commit for commit in commits 
-            if datetime.fromisoformat(commit['date'].replace('Z', '+00:00')) <= until_datetime
+            if datetime.fromisoformat(commit.date.replace('Z', '+00:00')) <= until_datetime
         ]
         
         # Create timeline
@@ -139,23 +180,8 @@ async def get_user_info(request: Request, response: Response):
         # Get GitHub client
         github = get_github_client(token)
         
-        # Get authenticated user
-        user = github.get_user()
-        
-        # Return user information
-        return {
-            "login": user.login,
-            "id": user.id,
-            "name": user.name,
-            "email": user.email,
-            "avatar_url": user.avatar_url,
-            "html_url": user.html_url,
-            "public_repos": user.public_repos,
-            "followers": user.followers,
-            "following": user.following,
-            "created_at": user.created_at.isoformat() if user.created_at else None,
-            "updated_at": user.updated_at.isoformat() if user.updated_at else None
-        }
+        # Get authenticated user information without blocking the event loop
+        return await asyncio.to_thread(_get_user_info, github)
     except Exception as e:
         if "401" in str(e) or "Bad credentials" in str(e):
             raise HTTPException(status_code=401, detail="Invalid GitHub token")
@@ -208,26 +234,8 @@ async def get_user_repos(request: Request, response: Response):
         # Get GitHub client
         github = get_github_client(token)
         
-        # Get authenticated user
-        user = github.get_user()
-        
-        # Get repositories
-        repos = []
-        for repo in user.get_repos():
-            repos.append({
-                "id": repo.id,
-                "name": repo.name,
-                "full_name": repo.full_name,
-                "description": repo.description,
-                "html_url": repo.html_url,
-                "language": repo.language,
-                "stargazers_count": repo.stargazers_count,
-                "forks_count": repo.forks_count,
-                "created_at": repo.created_at.isoformat() if repo.created_at else None,
-                "updated_at": repo.updated_at.isoformat() if repo.updated_at else None
-            })
-        
-        return repos
+        # Get repositories without blocking the event loop
+        return await asyncio.to_thread(_get_user_repos, github)
     except Exception as e:
         if "401" in str(e) or "Bad credentials" in str(e):
             raise HTTPException(status_code=401, detail="Invalid GitHub token")
@@ -1,7 +1,11 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Union
+import numpy as np
 from pydantic import BaseModel
 
 class Document(BaseModel):
-    vector: list[float]
-    subcommit_id: int
+    vector: np.ndarray
+    subcommit_id: Union[int, str]
     metadata: Dict[str, Any]
+
+    class Config:
+        arbitrary_types_allowed = True
@@ -113,15 +113,6 @@ class SubCommitNeighbors(BaseModel):
     """
     subcommits: List[SubCommitAnalysis] = Field(description="A collection of sub-commits that share semantic similarity with a reference sub-commit, ordered by relevance and thematic connection.")
 
-class SubCommitFileAnalysis(BaseModel):
-    """
-    Represents the file analysis for a specific SubCommit.
-    
-    This model identifies which specific files from the original commit
-    are relevant to a particular logical unit of work (SubCommit).
-    """
-    files: List[File] = Field(description="The specific files that are part of this logical unit of work.")
-
 class ChatResponse(BaseModel):
     """
     Represents the response from the chat model.
@@ -1,12 +1,11 @@
 from typing import List
-from app.models.models_commit import Commit, File, SubCommitNeighbors, SubCommitAnalysis
+from app.models.models_commit import Commit, SubCommitNeighbors, SubCommitAnalysis
 
-def format_commit_analysis_prompt(commit: Commit):
-    system_prompt = """
+COMMIT_ANALYSIS_SYSTEM_PROMPT = """
 You are a Commit Expert Analyzer specializing in code analysis and software development patterns.
 
 # Task
-Identify distinct logical units of work ("SubCommits") within this single GitHub commit.
+Identify distinct logical units of work ("SubCommits") within {scope}.
 
 # SubCommit Definition
 A SubCommit is ONE focused, logical change within a larger commit. Example: a commit might contain bug fixes, documentation updates, and refactoring - each is a separate SubCommit.
@@ -17,19 +16,22 @@ For EACH SubCommit, provide:
 2. Idea: Core purpose of this specific change (1-2 sentences)
 3. Description: Technical explanation of changes, implementation details, and implications (3-5 sentences)
 4. Type: Categorize as FEATURE, BUG, REFACTOR, DOCS, TEST, STYLE, CHORE, MILESTONE, or WARNING
+5. Files: The changed files that belong to this SubCommit. Only the filename is used, leave the patch empty
 
 # Guidelines
 - Identify ALL distinct units of work
 - Each SubCommit must focus on ONE logical change
 - Support conclusions with specific code evidence
 - If truly only one logical change exists, return just one SubCommit
+- Assign every changed file to exactly one SubCommit
 """
 
+def format_commit_details(commit: Commit, heading: str = "# Commit Details") -> str:
     # Format the commit details to include in the prompt
     files_details = "\n".join([f"- {file.filename} (additions: {file.additions}, deletions: {file.deletions}, changes: {file.changes}, status: {file.status}, patch: {file.patch})" for file in commit.files])
 
-    commit_details = f"""
-# Commit Details
+    return f"""
+{heading}
 - Message: {commit.message}
 - Author: {commit.author}
 - Date: {commit.date}
@@ -37,7 +39,29 @@ For EACH SubCommit, provide:
 {files_details}
 """
 
+def format_commit_analysis_prompt(commit: Commit):
+    system_prompt = COMMIT_ANALYSIS_SYSTEM_PROMPT.format(scope="this single GitHub commit")
+
     # Combine the system prompt with the commit details
+    return system_prompt + format_commit_details(commit)
+
+def format_batch_commit_analysis_prompt(commits: List[Commit]) -> str:
+    """
+    Formats the prompt for analyzing several commits in one request.
+
+    Args:
+        commits: The commits to analyze
+
+    Returns:
+        Formatted prompt string
+    """
+    system_prompt = COMMIT_ANALYSIS_SYSTEM_PROMPT.format(scope="each of the GitHub commits below, analyzing every commit on its own")
+    system_prompt += """- Set the Commit SHA of every SubCommit to the SHA of the commit it comes from
+- Never combine changes from different commits into one SubCommit
+"""
+
+    commit_details = "".join(format_commit_details(commit, heading=f"# Commit {commit.sha}") for commit in commits)
+
     return system_prompt + commit_details
 
 def format_epic_analysis_prompt(neighbors: SubCommitNeighbors) -> str:
@@ -125,55 +149,3 @@ Return ONLY the most similar sub-commits. Exclude the target sub-commit from res
 """
 
     return system_prompt + prompt
-
-def format_subcommit_files_prompt(commit: Commit, subcommit: SubCommitAnalysis) -> str:
-    """
-    Format a prompt for analyzing which files from a commit belong to a specific subcommit.
-    
-    Args:
-        commit: The original commit containing all files
-        subcommit: The subcommit to analyze for file relevance
-        
-    Returns:
-        Formatted prompt string
-    """
-    prompt = f"""
-    # File Analysis Task
-    
-    ## Original Commit
-    - SHA: {commit.sha}
-    - Message: {commit.message}
-    - Description: {commit.description or "N/A"}
-    
-    ## Files in Original Commit
-    {format_files_list(commit.files)}
-    
-    ## SubCommit Information
-    - Title: {subcommit.title}
-    - Idea: {subcommit.idea}
-    - Description: {subcommit.description}
-    - Type: {subcommit.type}
-    
-    ## Task
-    Analyze which specific files from the original commit are relevant to this particular logical unit of work (SubCommit).
-   
-    """
-    
-    return prompt
-
-def format_files_list(files: List[File]) -> str:
-    """Helper function to format the list of files for the prompt"""
-    files_text = ""
-    for i, file in enumerate(files):
-        files_text += f"""
-        File {i+1}:
-        - Filename: {file.filename}
-        - Status: {file.status}
-        - Changes: +{file.additions}, -{file.deletions}, total: {file.changes}
-        - Patch:
-        ```
-        {file.patch or "No patch available"}
-        ```
-        
-        """
-    return files_text
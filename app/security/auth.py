@@ -1,6 +1,13 @@
+import time
+import hashlib
+import threading
+from collections import OrderedDict
 from github import Github
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Tuple
 from app.config.settings import settings
+
+# Shared unauthenticated client for the OAuth flow, so its connection pool is reused across requests
+_github = Github(per_page=100, pool_size=32)
     
 def exchange_code_for_token(auth_code: str, redirect_uri: Optional[str] = None) -> Dict[str, Any]:
     """
@@ -14,11 +21,8 @@ def exchange_code_for_token(auth_code: str, redirect_uri: Optional[str] = None)
         Dictionary containing the access token and related information
     """
     try:
-        # Initialize GitHub client
-        g = Github()
-        
         # Exchange the code for an access token
-        token_data = g.get_oauth_application(
+        token_data = _github.get_oauth_application(
             client_id=settings.GITHUB_CLIENT_ID,
             client_secret=settings.GITHUB_CLIENT_SECRET
         ).get_access_token(auth_code, redirect_uri)
@@ -37,9 +41,19 @@ def exchange_code_for_token(auth_code: str, redirect_uri: Optional[str] = None)
             "success": False
         }
 
+# Authenticated clients are reused briefly per token, keyed by a digest so raw tokens are not kept as keys;
+# expiry bounds how long a token (revoked or not) and its connection pool stay in memory
+GITHUB_CLIENT_TTL_SECONDS = 300
+GITHUB_CLIENT_CACHE_SIZE = 128
+_github_clients: "OrderedDict[bytes, Tuple[float, Github]]" = OrderedDict()
+_github_clients_lock = threading.Lock()
+
 def get_github_client(access_token: str) -> Github:
     """
-    Create an authenticated GitHub client using an access token.
+    Get an authenticated GitHub client for an access token.
+    
+    Clients are cached for GITHUB_CLIENT_TTL_SECONDS per token so repeated requests
+    from the same user reuse the same keep-alive connection pool.
     
     Args:
         access_token: GitHub access token
@@ -47,4 +61,20 @@ def get_github_client(access_token: str) -> Github:
     Returns:
         Authenticated GitHub client
     """
-    return Github(access_token)
\ No newline at end of file
+    key = hashlib.sha256(access_token.encode()).digest()
+    now = time.monotonic()
+    with _github_clients_lock:
+        cached = _github_clients.get(key)
+        if cached and now - cached[0] < GITHUB_CLIENT_TTL_SECONDS:
+            return cached[1]
+        
+        github = Github(access_token, per_page=100, pool_size=32)
+        _github_clients[key] = (now, github)
+        _github_clients.move_to_end(key)
+        # Entries are ordered by creation time, so expired and excess clients are at the front
+        while _github_clients and (
+            len(_github_clients) > GITHUB_CLIENT_CACHE_SIZE
+            or now - next(iter(_github_clients.values()))[0] >= GITHUB_CLIENT_TTL_SECONDS
+        ):
+            _github_clients.popitem(last=False)
+        return github
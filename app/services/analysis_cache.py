@@ -0,0 +1,44 @@
+import time
+from typing import Optional
+from app.config.settings import settings
+from app.logger.logger import logger
+from app.models.models_commit import SubCommitAnalysisList
+from app.services.sqlite_cache import SqliteCache
+
+_cache = SqliteCache(
+    settings.ANALYSIS_CACHE_PATH,
+    "analyses",
+    ("sha TEXT PRIMARY KEY", "payload TEXT NOT NULL", "created_at REAL NOT NULL"),
+    settings.ANALYSIS_CACHE_MAX_ENTRIES,
+)
+
+def get_cached_analysis(sha: str) -> Optional[SubCommitAnalysisList]:
+    """
+    Get a cached Gemini analysis of a commit.
+
+    Args:
+        sha: The SHA of the commit
+
+    Returns:
+        The analysis, or None if it is not cached or has expired
+    """
+    try:
+        min_created_at = time.time() - settings.ANALYSIS_CACHE_TTL_DAYS * 86400
+        rows = _cache.fetch("SELECT payload FROM analyses WHERE sha = ? AND created_at >= ?", (sha, min_created_at))
+        return SubCommitAnalysisList.model_validate_json(rows[0][0]) if rows else None
+    except Exception as e:
+        logger.error(f"Error reading analysis of commit {sha} from cache: {e}")
+        return None
+
+def cache_analysis(sha: str, analysis: SubCommitAnalysisList) -> None:
+    """
+    Store a Gemini analysis of a commit in the cache.
+
+    Args:
+        sha: The SHA of the commit
+        analysis: The analysis of the commit
+    """
+    try:
+        _cache.store([(sha, analysis.model_dump_json(), time.time())])
+    except Exception as e:
+        logger.error(f"Error writing analysis of commit {sha} to cache: {e}")
@@ -1,4 +1,5 @@
 from typing import List, Dict, Any, Optional
+import numpy as np
 from app.models.models_AI import Document
 import chromadb
 from chromadb.errors import InvalidCollectionException
@@ -6,6 +7,9 @@ from app.logger.logger import logger
 
 chroma_client = chromadb.Client()
 
+# Number of documents added to a collection per call
+CHROMA_INSERT_BATCH_SIZE = 500
+
 def get_subcommit_collection(collection_name: str):
     """
     Get or create a ChromaDB collection with the given name.
@@ -42,39 +46,62 @@ def collection_exists(collection_name: str) -> bool:
         logger.error(f"Error checking if collection exists: {e}")
         return False
 
+def _add_documents(collection, documents: List[Document]) -> None:
+    collection.add(
+        embeddings=[doc.vector for doc in documents],
+        metadatas=[doc.metadata for doc in documents],
+        ids=[str(doc.subcommit_id) for doc in documents]
+    )
+
 def insert_document(documents: List[Document], collection_name: str = "subcommit_vectors"):
     """
     Insert a list of documents into ChromaDB.
     
+    Documents are added in batches of CHROMA_INSERT_BATCH_SIZE. If a batch fails, its
+    documents are retried one by one so a single bad document doesn't drop the whole batch.
+    
     Args:
         documents: List of Document objects to insert
         collection_name: Name of the collection to insert into (default: "subcommit_vectors")
         
     Returns:
-        Dictionary with status and message
+        Dictionary with status, message and the number of inserted documents
     """
     try:
         # Get or create the specified collection
         collection = get_subcommit_collection(collection_name)
         
-        # Extract data from documents
-        vectors = [doc.vector for doc in documents]
-        ids = [str(doc.subcommit_id) for doc in documents]
-        metadatas = [doc.metadata for doc in documents]
+        inserted_count = 0
+        errors = []
+        for i in range(0, len(documents), CHROMA_INSERT_BATCH_SIZE):
+            batch = documents[i:i + CHROMA_INSERT_BATCH_SIZE]
+            try:
+                _add_documents(collection, batch)
+                inserted_count += len(batch)
+            except Exception as e:
+                logger.warning(f"Batch insert into collection {collection_name} failed, inserting documents one by one: {e}")
+                for doc in batch:
+                    try:
+                        _add_documents(collection, [doc])
+                        inserted_count += 1
+                    except Exception as doc_error:
+                        errors.append(f"{doc.subcommit_id}: {doc_error}")
         
-        # Add documents to collection
-        collection.add(
-            embeddings=vectors,
-            metadatas=metadatas,
-            ids=ids
-        )
+        if errors:
+            logger.error(f"Failed to insert {len(errors)} documents into ChromaDB: {errors}")
+            if not inserted_count:
+                return {"status": "error", "error": f"Failed to insert documents: {errors}"}
         
-        return {"status": "success", "message": f"Successfully inserted {len(documents)} documents into collection {collection_name}"}
+        return {
+            "status": "success",
+            "message": f"Successfully inserted {inserted_count}/{len(documents)} documents into collection {collection_name}",
+            "inserted_count": inserted_count
+        }
     except Exception as e:
         logger.error(f"Error inserting documents into ChromaDB: {e}")
         return {"status": "error", "error": str(e)}
 
-def get_k_neighbors(collection_name: str, vector: List[float], k: int) -> Dict[str, Any]:
+def get_k_neighbors(collection_name: str, vector: np.ndarray, k: int) -> Dict[str, Any]:
     """
     Get k nearest neighbors to the given vector from ChromaDB.
     
@@ -94,7 +121,7 @@ def get_k_neighbors(collection_name: str, vector: List[float], k: int) -> Dict[s
         results = collection.query(
             query_embeddings=[vector],
             n_results=k,
-            include=["metadatas", "distances", "documents"]
+            include=["metadatas", "distances"]
         )
         
         # Process results
@@ -0,0 +1,40 @@
+import orjson
+from typing import Dict, Any, Optional
+from app.config.settings import settings
+from app.logger.logger import logger
+from app.services.sqlite_cache import SqliteCache
+
+# Commit SHAs are content-addressed, so a cached payload never goes stale and entries have no TTL
+_cache = SqliteCache(
+    settings.COMMIT_CACHE_PATH, "commits", ("sha TEXT PRIMARY KEY", "payload TEXT NOT NULL"), settings.COMMIT_CACHE_MAX_ENTRIES
+)
+
+def get_cached_commit(sha: str) -> Optional[Dict[str, Any]]:
+    """
+    Get a cached GitHub commit detail payload.
+
+    Args:
+        sha: The SHA of the commit
+
+    Returns:
+        The cached commit payload, or None if it is not cached
+    """
+    try:
+        rows = _cache.fetch("SELECT payload FROM commits WHERE sha = ?", (sha,))
+        return orjson.loads(rows[0][0]) if rows else None
+    except Exception as e:
+        logger.error(f"Error reading commit {sha} from cache: {e}")
+        return None
+
+def cache_commit(sha: str, payload: Dict[str, Any]) -> None:
+    """
+    Store a GitHub commit detail payload in the cache.
+
+    Args:
+        sha: The SHA of the commit
+        payload: The commit payload, trimmed to the fields a Commit is built from
+    """
+    try:
+        _cache.store([(sha, orjson.dumps(payload))])
+    except Exception as e:
+        logger.error(f"Error writing commit {sha} to cache: {e}")
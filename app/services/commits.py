@@ -1,191 +1,508 @@
 import os
-from github import Github
-from typing import List, Optional, Dict, Any
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, AsyncIterator, Tuple, Callable, Awaitable
 import httpx
+import orjson
+from tenacity import retry, stop_any, stop_after_attempt, retry_if_result, retry_if_exception_type, RetryCallState
 from fastapi import status
 from app.models.models_commit import Commit, File, SubCommitAnalysis, Repository
 from app.config.settings import settings
 from app.logger.logger import logger
-from app.services import supabase_service
+from app.services import supabase_service, commit_cache
 
 # Add this custom exception class
 class AlreadyAnalyzedRepositoryError(Exception):
     """Exception raised when a repository has already been analyzed."""
     pass
 
-async def get_repository_commits(repo_url: str, access_token: Optional[str] = settings.GITHUB_ACCESS_TOKEN, branch: str = None, path: str = None) -> List[Commit]:
+class CommitListingError(Exception):
+    """Exception raised when a page of a repository's commit listing could not be fetched."""
+    pass
+
+@lru_cache(maxsize=1024)
+def parse_repo_url(repo_url: str) -> Tuple[str, str]:
     """
-    Get all commits from a GitHub repository using GitHub REST API v3.
+    Extract the owner and repository name from a GitHub repository URL.
     
     Args:
         repo_url: The URL of the repository (e.g., "https://github.com/username/repo")
-        access_token: GitHub personal access token (optional)
-        branch: The branch to get commits from (optional)
-        path: The path to filter commits by (optional)
         
     Returns:
-        List of Commit objects
+        Tuple of (owner, repo)
     """
-    async with httpx.AsyncClient() as client:
+    _, _, repo_name = repo_url.partition("github.com/")
+    owner, _, repo = repo_name.removesuffix(".git").partition("/")
+    if not owner or not repo or "/" in repo:
+        raise ValueError(f"Invalid GitHub repository URL: {repo_url}")
+    return owner, repo
+
+# Shared client so connections (and TLS sessions) to GitHub are reused across calls
+github_client = httpx.AsyncClient(
+    base_url="https://api.github.com",
+    headers={"Accept": "application/vnd.github.v3+json"},
+    limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+    http2=True,
+    timeout=30.0,
+)
+
+# GitHub caps per_page at 100; fewer, larger pages means fewer round-trips
+GITHUB_PER_PAGE = 100
+# Maximum number of commit list pages requested from GitHub at the same time
+GITHUB_PAGE_CONCURRENCY = 8
+GITHUB_MAX_ATTEMPTS = 5
+# Longer rate-limit waits are not sat out; the limited response is returned to the caller instead
+GITHUB_MAX_RATE_LIMIT_WAIT_SECONDS = 60
+
+def _is_rate_limited(response: httpx.Response) -> bool:
+    return response.status_code in (403, 429) and (
+        response.headers.get("X-RateLimit-Remaining") == "0" or "Retry-After" in response.headers
+    )
+
+def _should_retry(response: httpx.Response) -> bool:
+    return _is_rate_limited(response) or response.status_code >= 500
+
+def _rate_limit_wait(response: httpx.Response) -> Optional[float]:
+    """Seconds GitHub asks to wait before retrying, or None if the response does not say."""
+    retry_after = response.headers.get("Retry-After")
+    if retry_after is not None:
+        # Retry-After is either a number of seconds or an HTTP date
         try:
-            logger.info(f"Fetching commits from repo: {repo_url}, branch: {branch}, path: {path}")
-            
-            # Extract owner and repo name from URL
-            repo_name = repo_url.split("github.com/")[1]
-            repo_name = repo_name.replace(".git", "") if repo_name.endswith(".git") else repo_name
-            owner, repo = repo_name.split("/")
-            
-            # Set up API headers
-            headers = {
-                "Accept": "application/vnd.github.v3+json"
+            return max(float(retry_after), 0)
+        except ValueError:
+            pass
+        try:
+            return max(parsedate_to_datetime(retry_after).timestamp() - time.time(), 0)
+        except (TypeError, ValueError):
+            return None
+    if response.headers.get("X-RateLimit-Remaining") == "0":
+        try:
+            return max(int(response.headers["X-RateLimit-Reset"]) - time.time() + 1, 0)
+        except (KeyError, ValueError):
+            return None
+    return None
+
+def _rate_limit_wait_too_long(retry_state: RetryCallState) -> bool:
+    outcome = retry_state.outcome
+    if outcome.failed:
+        return False
+    wait = _rate_limit_wait(outcome.result())
+    if wait is not None and wait > GITHUB_MAX_RATE_LIMIT_WAIT_SECONDS:
+        logger.warning(f"GitHub rate limit resets in {wait:.0f}s, not waiting for it")
+        return True
+    return False
+
+def _retry_wait(retry_state: RetryCallState) -> float:
+    """Wait until GitHub's rate limit resets, or back off exponentially on server errors."""
+    outcome = retry_state.outcome
+    if not outcome.failed:
+        wait = _rate_limit_wait(outcome.result())
+        if wait is not None and wait <= GITHUB_MAX_RATE_LIMIT_WAIT_SECONDS:
+            logger.warning(f"GitHub rate limit hit, retrying in {wait:.0f}s")
+            return wait
+    return 0.5 * 2 ** (retry_state.attempt_number - 1)
+
+@retry(
+    stop=stop_any(stop_after_attempt(GITHUB_MAX_ATTEMPTS), _rate_limit_wait_too_long),
+    wait=_retry_wait,
+    retry=retry_if_result(_should_retry) | retry_if_exception_type(httpx.TransportError),
+    # Hand the last response back so callers report it like any other failed request
+    retry_error_callback=lambda retry_state: retry_state.outcome.result()
+)
+async def _get_with_retry(client: httpx.AsyncClient, url: str, headers: Dict[str, str], params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+    return await client.get(url, headers=headers, params=params)
+
+async def list_commit_pages(client: httpx.AsyncClient, commits_api_url: str, headers: Dict[str, str], params: Dict[str, Any]) -> AsyncIterator[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    List the commit summaries of a repository, following GitHub's pagination.
+    
+    The first page is fetched on its own to read the `Link` header. If it
+    advertises a `last` page, the remaining pages are fetched concurrently and
+    yielded as soon as each one arrives, so callers can start working on a
+    page while the others are still in flight.
+    
+    Args:
+        client: The HTTP client to issue requests with
+        commits_api_url: The `/repos/{owner}/{repo}/commits` endpoint
+        headers: GitHub API headers
+        params: Query parameters (branch, path) for the commits endpoint
+        
+    Yields:
+        Tuples of (page number, commit summaries on that page), in completion order
+        
+    Raises:
+        CommitListingError: If any page of the listing could not be fetched
+    """
+    params = {**params, "per_page": GITHUB_PER_PAGE}
+    
+    first_response = await _get_with_retry(client, commits_api_url, headers, {**params, "page": 1})
+    if first_response.status_code != status.HTTP_200_OK:
+        logger.error(f"Error fetching commits: {first_response.text}")
+        raise CommitListingError(f"Error fetching commits: HTTP {first_response.status_code}")
+    
+    first_page_data = orjson.loads(first_response.content)
+    logger.info(f"Processing page 1, fetched {len(first_page_data)} commits")
+    yield 1, first_page_data
+    
+    last_url = first_response.links.get("last", {}).get("url")
+    if not last_url:
+        return
+    last_page = int(httpx.URL(last_url).params.get("page", 1))
+    
+    semaphore = asyncio.Semaphore(GITHUB_PAGE_CONCURRENCY)
+    
+    async def fetch_page(page: int) -> Tuple[int, List[Dict[str, Any]]]:
+        async with semaphore:
+            response = await _get_with_retry(client, commits_api_url, headers, {**params, "page": page})
+        if response.status_code != status.HTTP_200_OK:
+            logger.error(f"Error fetching commits page {page}: {response.text}")
+            raise CommitListingError(f"Error fetching commits page {page}: HTTP {response.status_code}")
+        page_data = orjson.loads(response.content)
+        logger.info(f"Processing page {page}, fetched {len(page_data)} commits")
+        return page, page_data
+    
+    page_fetches = [asyncio.create_task(fetch_page(page)) for page in range(2, last_page + 1)]
+    try:
+        for next_page in asyncio.as_completed(page_fetches):
+            yield await next_page
+    finally:
+        # Stop the remaining requests when a page fails or the caller stops listing
+        for page_fetch in page_fetches:
+            page_fetch.cancel()
+
+# Fields of a GitHub file entry that are turned into a File
+COMMIT_FILE_FIELDS = ("filename", "additions", "deletions", "changes", "status", "raw_url", "blob_url")
+
+def _trim_commit_detail(full_commit: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Keep only the parts of a GitHub commit detail payload that a Commit is built from.
+    
+    Patches are truncated to MAX_PATCH_LENGTH, so the cached copy stays small even for huge diffs.
+    
+    Args:
+        full_commit: The commit payload as returned by the GitHub API
+        
+    Returns:
+        The trimmed payload, in the same shape as GitHub's
+    """
+    author = full_commit.get("author") or {}
+    git_commit = full_commit["commit"]
+    return {
+        "sha": full_commit["sha"],
+        "html_url": full_commit["html_url"],
+        "author": {"login": author.get("login", "anonymous"), "url": author.get("url", "")},
+        "commit": {
+            "message": git_commit["message"],
+            "author": {"date": git_commit["author"]["date"], "email": git_commit["author"]["email"]},
+        },
+        "files": [
+            {
+                **{field: file[field] for field in COMMIT_FILE_FIELDS if field in file},
+                "patch": (file.get("patch") or "")[:settings.MAX_PATCH_LENGTH],
             }
-            if access_token:
-                headers["Authorization"] = f"token {access_token}"
-            
-            # Get repository information
-            repo_api_url = f"https://api.github.com/repos/{owner}/{repo}"
-            repo_response = await client.get(repo_api_url, headers=headers)
-            
-            if repo_response.status_code != status.HTTP_200_OK:
-                logger.error(f"Error finding repository: {repo_response.json()}")
-                return []
-                
-            repo_data = repo_response.json()
-            logger.info(f"Repository found: {repo_data['full_name']}")
-            
-            # Store repository information
-            repo_obj = Repository(
-                id=str(repo_data['id']),
-                name=repo_data['full_name'],
-                url=repo_url,
-            )
-            
-            try:
-                repo_storage_result = supabase_service.store_repo([repo_obj])
-                logger.info(f"Repository storage result: {repo_storage_result}")
-                
-                # Check if the repository already exists
-                if "error" in repo_storage_result and repo_storage_result.get("code") == "duplicate_key":
-                    raise AlreadyAnalyzedRepositoryError(f"Repository {repo_url} has already been analyzed.")
-                    
-            except Exception as e:
-                if isinstance(e, AlreadyAnalyzedRepositoryError):
-                    raise e
-                logger.error(f"Error storing repository: {str(e)}")
-            
-            # Prepare API URL for commits
-            commits_api_url = f"https://api.github.com/repos/{owner}/{repo}/commits"
-            params = {}
-            
-            if branch:
-                params["sha"] = branch
-            if path:
-                params["path"] = path
-            
-            # Process commits in batches for better memory management
-            batch_size = settings.BATCH_SIZE if hasattr(settings, 'BATCH_SIZE') else 50
-            params["per_page"] = batch_size
-            
-            commit_list = []
-            page = 1
-            total_commits = 0
+            for file in full_commit.get("files", ())
+        ],
+    }
+
+async def _fetch_and_build_commit(client: httpx.AsyncClient, semaphore: asyncio.Semaphore, commit_data: Dict[str, Any], commits_api_url: str, repo_id: str, headers: Dict[str, str]) -> Optional[Commit]:
+    """
+    Fetch the details of a listed commit and build a Commit from them.
+    
+    Args:
+        client: The HTTP client to issue requests with
+        semaphore: Bounds the number of detail requests in flight
+        commit_data: The commit summary from the commits listing
+        commits_api_url: The `/repos/{owner}/{repo}/commits` endpoint
+        repo_id: The GitHub ID of the repository
+        headers: GitHub API headers
+        
+    Returns:
+        The Commit, or None if it could not be fetched
+    """
+    commit_sha = commit_data["sha"]
+    try:
+        # Patches are only exposed by the REST detail endpoint (GraphQL's Commit has no
+        # per-file diff), so one request per commit is unavoidable when diffs are needed.
+        # Without diffs the listing payload is enough and no extra request is made.
+        if settings.FETCH_FILE_DIFFS:
+            # Commit payloads are immutable, so a cached (trimmed) copy is always current
+            full_commit = await asyncio.to_thread(commit_cache.get_cached_commit, commit_sha)
             
-            while True:
-                params["page"] = page
-                commits_response = await client.get(commits_api_url, headers=headers, params=params)
+            if full_commit is None:
+                # Get detailed commit information
+                commit_detail_url = f"{commits_api_url}/{commit_sha}"
+                async with semaphore:
+                    commit_detail_response = await _get_with_retry(client, commit_detail_url, headers)
                 
-                if commits_response.status_code != status.HTTP_200_OK:
-                    logger.error(f"Error fetching commits: {commits_response.json()}")
-                    break
-                    
-                commits_data = commits_response.json()
-                if not commits_data:
-                    break
+                if commit_detail_response.status_code != status.HTTP_200_OK:
+                    logger.error(f"Error fetching commit details for {commit_sha}: {commit_detail_response.text}")
+                    return None
                     
-                total_commits += len(commits_data)
-                logger.info(f"Processing page {page}, fetched {len(commits_data)} commits")
-                
-                for commit_data in commits_data:
-                    try:
-                        # Get detailed commit information
-                        commit_sha = commit_data["sha"]
-                        commit_detail_url = f"https://api.github.com/repos/{owner}/{repo}/commits/{commit_sha}"
-                        commit_detail_response = await client.get(commit_detail_url, headers=headers)
-                        
-                        if commit_detail_response.status_code != status.HTTP_200_OK:
-                            logger.error(f"Error fetching commit details for {commit_sha}: {commit_detail_response.json()}")
-                            continue
-                            
-                        full_commit = commit_detail_response.json()
-                        
-                        # Process files
-                        commit_files = []
-                        for file in full_commit.get("files", []):
-                            commit_files.append(File(
-                                filename=file.get("filename", ""),
-                                additions=file.get("additions", 0),
-                                deletions=file.get("deletions", 0),
-                                changes=file.get("changes", 0),
-                                status=file.get("status", ""),
-                                raw_url=file.get("raw_url", ""),
-                                blob_url=file.get("blob_url", ""),
-                                patch=file.get("patch", ""),
-                            ))
-                        
-                        # Handle case where author might be None
-                        author_login = full_commit.get("author", {}).get("login", "anonymous") if full_commit.get("author") else "anonymous"
-                        author_url = full_commit.get("author", {}).get("url", "") if full_commit.get("author") else ""
-                        
-                        commit_obj = Commit(
-                            sha=full_commit["sha"],
-                            author=author_login,
-                            date=full_commit["commit"]["author"]["date"],
-                            message=full_commit["commit"]["message"],
-                            url=full_commit["html_url"],
-                            author_email=full_commit["commit"]["author"]["email"],
-                            description="",
-                            author_url=author_url,
-                            repo_id=str(repo_data["id"]),
-                            files=commit_files
-                        )
-                        commit_list.append(commit_obj)
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing commit {commit_data.get('sha', 'unknown')}: {str(e)}")
-                        continue
-                
-                # Check if there are more pages
-                if len(commits_data) < batch_size:
+                full_commit = _trim_commit_detail(orjson.loads(commit_detail_response.content))
+                await asyncio.to_thread(commit_cache.cache_commit, commit_sha, full_commit)
+        else:
+            # The list payload has everything but the files
+            full_commit = commit_data
+        
+        # Process files; GitHub's payload has a fixed schema, so skip validation
+        commit_files = [
+            File.model_construct(
+                filename=file.get("filename", ""),
+                additions=file.get("additions", 0),
+                deletions=file.get("deletions", 0),
+                changes=file.get("changes", 0),
+                status=file.get("status", ""),
+                raw_url=file.get("raw_url", ""),
+                blob_url=file.get("blob_url", ""),
+                patch=(file.get("patch") or "")[:settings.MAX_PATCH_LENGTH],
+            )
+            for file in full_commit.get("files", ())
+        ]
+        
+        # Handle case where author might be None
+        author = full_commit.get("author") or {}
+        author_login = author.get("login", "anonymous")
+        author_url = author.get("url", "")
+        git_author = full_commit["commit"]["author"]
+        
+        return Commit(
+            sha=full_commit["sha"],
+            author=author_login,
+            date=git_author["date"],
+            message=full_commit["commit"]["message"],
+            url=full_commit["html_url"],
+            author_email=git_author["email"],
+            description="",
+            author_url=author_url,
+            repo_id=repo_id,
+            files=commit_files
+        )
+        
+    except Exception as e:
+        logger.error(f"Error processing commit {commit_sha}: {str(e)}")
+        return None
+
+# Listings (repo id, branch, path) whose last full refresh stored every new commit, with when it finished.
+# Only then can a refresh stop at a fully stored first page: older gaps (failed detail fetches,
+# interrupted runs) are otherwise only repaired by scanning every page
+_complete_scans: Dict[Tuple[str, Optional[str], Optional[str]], float] = {}
+# Even after a complete scan, every page is checked again at least this often
+FULL_SCAN_INTERVAL_SECONDS = 24 * 3600
+
+async def _fetch_commits(client: httpx.AsyncClient, owner: str, repo: str, repo_id: str, headers: Dict[str, str], branch: str = None, path: str = None, only_new: bool = False, on_page: Optional[Callable[[List[Commit]], Awaitable[List[Commit]]]] = None) -> List[Commit]:
+    """
+    List the commits of a repository and build a Commit for each one, including its files.
+    
+    Args:
+        client: The HTTP client to issue requests with
+        owner: The repository owner
+        repo: The repository name
+        repo_id: The GitHub ID of the repository
+        headers: GitHub API headers
+        branch: The branch to get commits from (optional)
+        path: The path to filter commits by (optional)
+        only_new: Skip commits that are already stored in Supabase
+        on_page: Called with each page's commits as soon as they are built, so they can be
+            stored while later pages are still being fetched; returns the commits to keep
+        
+    Returns:
+        List of Commit objects
+    """
+    # Prepare API URL for commits
+    commits_api_url = f"/repos/{owner}/{repo}/commits"
+    params = {}
+    
+    if branch:
+        params["sha"] = branch
+    if path:
+        params["path"] = path
+    
+    semaphore = asyncio.Semaphore(settings.GITHUB_CONCURRENCY)
+    
+    async def filter_new(page_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not page_data:
+            return page_data
+        # Let Postgres diff the listed SHAs against the stored ones
+        missing_shas = await asyncio.to_thread(supabase_service.get_missing_commit_shas, repo_id, [commit_data["sha"] for commit_data in page_data])
+        return [commit_data for commit_data in page_data if commit_data["sha"] in missing_shas]
+    
+    skipped_count = 0
+    
+    async def process_page(page_data: List[Dict[str, Any]], filtered: bool = False) -> List[Commit]:
+        nonlocal skipped_count
+        new_page_data = page_data
+        if only_new and not filtered:
+            new_page_data = await filter_new(page_data)
+        
+        # Fetch commit details concurrently, bounded to avoid tripping GitHub's abuse limits
+        results = await asyncio.gather(*[
+            _fetch_and_build_commit(client, semaphore, commit_data, commits_api_url, repo_id, headers)
+            for commit_data in new_page_data
+        ])
+        page_commits = [commit for commit in results if commit is not None]
+        if on_page and page_commits:
+            page_commits = await on_page(page_commits)
+        skipped_count += len(new_page_data) - len(page_commits)
+        return page_commits
+    
+    # Start on each page's details as soon as it is listed instead of waiting for every page
+    scan_key = (repo_id, branch, path)
+    full_scan = True
+    page_numbers = []
+    page_tasks = []
+    listed_count = 0
+    pages = list_commit_pages(client, commits_api_url, headers, params)
+    try:
+        async for page, page_data in pages:
+            listed_count += len(page_data)
+            if only_new and page == 1:
+                # The remaining pages are only requested once the first one has been handled, so
+                # check it before asking for them: GitHub lists newest first, and when the newest
+                # commits are stored and the last full scan left no gaps, nothing older is missing
+                page_data = await filter_new(page_data)
+                completed_at = _complete_scans.get(scan_key)
+                if not page_data and completed_at and time.monotonic() - completed_at < FULL_SCAN_INTERVAL_SECONDS:
+                    logger.info("No new commits on the first page, skipping the remaining pages")
+                    full_scan = False
                     break
-                    
-                page += 1
-            
-            logger.info(f"Total commits processed: {total_commits}")
-            
-            # Store commits
-            if commit_list:
-                commit_storage_result = await supabase_service.store_commits(commit_list)
-                logger.info(f"Commit storage result success.")
-                
-                if "existing_commits" in commit_storage_result and len(commit_list) == len(commit_storage_result["existing_commits"]):
-                    logger.info("All commits already analyzed.")
-                    return []
-                elif "inserted_commits" in commit_storage_result:
-                    logger.info(f"Successfully fetched {len(commit_list)} commits and stored them with analyses.")
-                    return commit_list
-                else:
-                    logger.warning("No commits were stored or all already existed, but the 'existing_commits' key wasn't present.")
-                    return []
+                # Until this scan finishes cleanly, a partly stored listing must not be trusted
+                _complete_scans.pop(scan_key, None)
+                page_numbers.append(page)
+                page_tasks.append(asyncio.create_task(process_page(page_data, filtered=True)))
+                continue
+            page_numbers.append(page)
+            page_tasks.append(asyncio.create_task(process_page(page_data)))
+        
+        page_results = await asyncio.gather(*page_tasks)
+    finally:
+        # If listing or a page fails, stop the other pages' detail fetches and writes with it
+        for page_task in page_tasks:
+            page_task.cancel()
+        await pages.aclose()
+    
+    if only_new and full_scan and not skipped_count:
+        _complete_scans[scan_key] = time.monotonic()
+    
+    # Restore GitHub's newest-first order
+    commit_list = []
+    for _, page_commits in sorted(zip(page_numbers, page_results), key=lambda item: item[0]):
+        commit_list.extend(page_commits)
+    
+    logger.info(f"Completed processing {listed_count} commits, built {len(commit_list)} commits")
+    return commit_list
 
-            logger.info(f"No commits to store.")
+# Repository metadata (id, full name) practically never changes, so it is cached briefly per token
+REPO_CACHE_TTL_SECONDS = 300
+REPO_CACHE_MAX_ENTRIES = 1024
+_repo_cache: Dict[Tuple[str, str, Optional[str]], Tuple[float, Dict[str, Any]]] = {}
+
+async def _get_repo_data(owner: str, repo: str, headers: Dict[str, str]) -> Optional[Dict[str, Any]]:
+    """
+    Get a repository's id and full name from GitHub, using a short-lived in-memory cache.
+    
+    Args:
+        owner: The repository owner
+        repo: The repository name
+        headers: Request headers, including authorization if any
+        
+    Returns:
+        Dictionary with the repository's id and full_name, or None if it could not be found
+    """
+    cache_key = (owner.lower(), repo.lower(), headers.get("Authorization"))
+    cached = _repo_cache.get(cache_key)
+    if cached and time.monotonic() - cached[0] < REPO_CACHE_TTL_SECONDS:
+        return cached[1]
+    
+    repo_response = await _get_with_retry(github_client, f"/repos/{owner}/{repo}", headers)
+    if repo_response.status_code != status.HTTP_200_OK:
+        logger.error(f"Error finding repository: {repo_response.text}")
+        return None
+    
+    repo_data = orjson.loads(repo_response.content)
+    repo_data = {"id": repo_data["id"], "full_name": repo_data["full_name"]}
+    _repo_cache.pop(cache_key, None)
+    _repo_cache[cache_key] = (time.monotonic(), repo_data)
+    if len(_repo_cache) > REPO_CACHE_MAX_ENTRIES:
+        _repo_cache.pop(next(iter(_repo_cache)))
+    return repo_data
+
+async def get_repository_commits(repo_url: str, access_token: Optional[str] = settings.GITHUB_ACCESS_TOKEN, branch: str = None, path: str = None) -> List[Commit]:
+    """
+    Get all commits from a GitHub repository using GitHub REST API v3.
+    
+    Args:
+        repo_url: The URL of the repository (e.g., "https://github.com/username/repo")
+        access_token: GitHub personal access token (optional)
+        branch: The branch to get commits from (optional)
+        path: The path to filter commits by (optional)
+        
+    Returns:
+        List of Commit objects
+    """
+    try:
+        logger.info(f"Fetching commits from repo: {repo_url}, branch: {branch}, path: {path}")
+        
+        owner, repo = parse_repo_url(repo_url)
+        
+        # Set up API headers
+        headers = {}
+        if access_token:
+            headers["Authorization"] = f"token {access_token}"
+        
+        # Get repository information
+        repo_data = await _get_repo_data(owner, repo, headers)
+        if repo_data is None:
             return []
+            
+        logger.info(f"Repository found: {repo_data['full_name']}")
+        
+        repo_obj = Repository(
+            id=str(repo_data['id']),
+            name=repo_data['full_name'],
+            url=repo_url,
+        )
         
-        except AlreadyAnalyzedRepositoryError as e:
-            logger.warning(f"Repository {repo_url} has already been analyzed.")
-            raise e
+        # Bail out before fetching any commits if the repository was already analyzed.
+        # supabase-py is synchronous; keep its round-trips off the event loop
+        try:
+            if await asyncio.to_thread(supabase_service.repo_exists, repo_obj.id):
+                raise AlreadyAnalyzedRepositoryError(f"Repository {repo_url} has already been analyzed.")
         except Exception as e:
-            logger.error(f"Error fetching commits: {e}")
+            if isinstance(e, AlreadyAnalyzedRepositoryError):
+                raise e
+            logger.error(f"Error checking repository: {str(e)}")
+        
+        # A failed listing raises before anything is stored, so the repository can be retried
+        commit_list = await _fetch_commits(github_client, owner, repo, repo_obj.id, headers, branch, path)
+        if not commit_list:
+            logger.info(f"No commits to store.")
+            return []
+        
+        # Store the repository with its first batch of commits atomically, then the rest in batches
+        commit_storage_result = await supabase_service.store_repo_and_commits(repo_obj, commit_list)
+        if commit_storage_result.get("code") == "duplicate_key":
+            raise AlreadyAnalyzedRepositoryError(f"Repository {repo_url} has already been analyzed.")
+        
+        logger.info(f"Commit storage result success.")
+        
+        if "existing_commits" in commit_storage_result and len(commit_list) == len(commit_storage_result["existing_commits"]):
+            logger.info("All commits already analyzed.")
+            return []
+        elif "inserted_commits" in commit_storage_result:
+            logger.info(f"Successfully fetched {len(commit_list)} commits and stored them with analyses.")
+            return commit_list
+        else:
+            logger.warning("No commits were stored or all already existed, but the 'existing_commits' key wasn't present.")
             return []
+    
+    except AlreadyAnalyzedRepositoryError as e:
+        logger.warning(f"Repository {repo_url} has already been analyzed.")
+        raise e
+    except Exception as e:
+        logger.error(f"Error fetching commits: {e}")
+        return []
 
 async def get_new_repository_commits(repo_url: str, access_token: Optional[str] = settings.GITHUB_ACCESS_TOKEN, branch: str = None, path: str = None) -> List[Commit]:
     """
@@ -200,156 +517,42 @@ async def get_new_repository_commits(repo_url: str, access_token: Optional[str]
     Returns:
         List of new Commit objects that haven't been analyzed yet
     """
-    async with httpx.AsyncClient() as client:
-        try:
-            logger.info(f"Fetching new commits from repo: {repo_url}, branch: {branch}, path: {path}")
-            
-            # Extract owner and repo name from URL
-            repo_name = repo_url.split("github.com/")[1]
-            repo_name = repo_name.replace(".git", "") if repo_name.endswith(".git") else repo_name
-            owner, repo = repo_name.split("/")
-            
-            # Set up API headers
-            headers = {
-                "Accept": "application/vnd.github.v3+json"
-            }
-            if access_token:
-                headers["Authorization"] = f"token {access_token}"
-            
-            # Get repository information
-            repo_api_url = f"https://api.github.com/repos/{owner}/{repo}"
-            repo_response = await client.get(repo_api_url, headers=headers)
-            
-            if repo_response.status_code != status.HTTP_200_OK:
-                logger.error(f"Error finding repository: {repo_response.json()}")
-                return []
-                
-            repo_data = repo_response.json()
-            repo_id = str(repo_data["id"])
-            logger.info(f"Repository found: {repo_data['full_name']}")
-            
-            # Fetch existing commits from Supabase for this repository
-            supabase = supabase_service.get_client()
-            if not supabase:
-                logger.error("Failed to initialize Supabase client")
-                return []
-                
-            existing_commits_result = supabase.table('commits').select('sha').eq('repo_id', repo_id).execute()
-            existing_commit_shas = {item['sha'] for item in existing_commits_result.data} if existing_commits_result.data else set()
-            logger.info(f"Found {len(existing_commit_shas)} existing commits in the database for repository {repo_id}")
-            
-            # Prepare API URL for commits
-            commits_api_url = f"https://api.github.com/repos/{owner}/{repo}/commits"
-            params = {}
-            
-            if branch:
-                params["sha"] = branch
-            if path:
-                params["path"] = path
-            
-            # Process commits in batches for better memory management
-            batch_size = settings.BATCH_SIZE if hasattr(settings, 'BATCH_SIZE') else 50
-            params["per_page"] = batch_size
-            
-            commit_list = []
-            page = 1
-            processed_count = 0
-            new_count = 0
-            
-            while True:
-                params["page"] = page
-                commits_response = await client.get(commits_api_url, headers=headers, params=params)
-                
-                if commits_response.status_code != status.HTTP_200_OK:
-                    logger.error(f"Error fetching commits: {commits_response.json()}")
-                    break
-                    
-                commits_data = commits_response.json()
-                if not commits_data:
-                    break
-                    
-                processed_count += len(commits_data)
-                logger.info(f"Processing page {page}, fetched {len(commits_data)} commits")
-                
-                for commit_data in commits_data:
-                    commit_sha = commit_data["sha"]
-                    
-                    # Skip if commit already exists in database
-                    if commit_sha in existing_commit_shas:
-                        logger.debug(f"Skipping existing commit: {commit_sha}")
-                        continue
-                        
-                    new_count += 1
-                    try:
-                        # Get detailed commit information
-                        commit_detail_url = f"https://api.github.com/repos/{owner}/{repo}/commits/{commit_sha}"
-                        commit_detail_response = await client.get(commit_detail_url, headers=headers)
-                        
-                        if commit_detail_response.status_code != status.HTTP_200_OK:
-                            logger.error(f"Error fetching commit details for {commit_sha}: {commit_detail_response.json()}")
-                            continue
-                            
-                        full_commit = commit_detail_response.json()
-                        
-                        # Process files
-                        commit_files = []
-                        for file in full_commit.get("files", []):
-                            commit_files.append(File(
-                                filename=file.get("filename", ""),
-                                additions=file.get("additions", 0),
-                                deletions=file.get("deletions", 0),
-                                changes=file.get("changes", 0),
-                                status=file.get("status", ""),
-                                raw_url=file.get("raw_url", ""),
-                                blob_url=file.get("blob_url", ""),
-                                patch=file.get("patch", ""),
-                            ))
-                        
-                        # Handle case where author might be None
-                        author_login = full_commit.get("author", {}).get("login", "anonymous") if full_commit.get("author") else "anonymous"
-                        author_url = full_commit.get("author", {}).get("url", "") if full_commit.get("author") else ""
-                        
-                        commit_obj = Commit(
-                            sha=full_commit["sha"],
-                            author=author_login,
-                            date=full_commit["commit"]["author"]["date"],
-                            message=full_commit["commit"]["message"],
-                            url=full_commit["html_url"],
-                            author_email=full_commit["commit"]["author"]["email"],
-                            description="",
-                            author_url=author_url,
-                            repo_id=repo_id,
-                            files=commit_files
-                        )
-                        commit_list.append(commit_obj)
-                        
-                    except Exception as e:
-                        logger.error(f"Error processing commit {commit_sha}: {str(e)}")
-                        continue
-                
-                # Check if there are more pages
-                if len(commits_data) < batch_size:
-                    break
-                    
-                page += 1
+    try:
+        logger.info(f"Fetching new commits from repo: {repo_url}, branch: {branch}, path: {path}")
+        
+        owner, repo = parse_repo_url(repo_url)
+        
+        # Set up API headers
+        headers = {}
+        if access_token:
+            headers["Authorization"] = f"token {access_token}"
+        
+        # Get repository information
+        repo_data = await _get_repo_data(owner, repo, headers)
+        if repo_data is None:
+            return []
             
-            logger.info(f"Completed processing {processed_count} commits, found {new_count} new commits")
+        repo_id = str(repo_data["id"])
+        logger.info(f"Repository found: {repo_data['full_name']}")
+        
+        async def store_page(page_commits: List[Commit]) -> List[Commit]:
+            # Store each page while the remaining pages are still being fetched
+            commit_storage_result = await supabase_service.store_commits(page_commits)
+            logger.info(f"New commit storage result: {commit_storage_result.get('message', commit_storage_result.get('error'))}")
             
-            # Store new commits
-            if commit_list:
-                commit_storage_result = await supabase_service.store_commits(commit_list)
-                logger.info(f"New commit storage result: {commit_storage_result}")
-                
-                if "inserted_commits" in commit_storage_result:
-                    logger.info(f"Successfully fetched {len(commit_list)} new commits and stored them.")
-                    return commit_list
-                else:
-                    logger.warning("No new commits were stored.")
-                    return []
-
-            logger.info(f"No new commits to store.")
+            if "inserted_commits" in commit_storage_result:
+                return page_commits
+            logger.warning(f"{len(page_commits)} new commits were not stored.")
             return []
         
-        except Exception as e:
-            logger.error(f"Error fetching new commits: {e}")
-            return []
\ No newline at end of file
+        commit_list = await _fetch_commits(github_client, owner, repo, repo_id, headers, branch, path, only_new=True, on_page=store_page)
+        
+        if commit_list:
+            logger.info(f"Successfully fetched {len(commit_list)} new commits and stored them.")
+        else:
+            logger.info(f"No new commits to store.")
+        return commit_list
+    
+    except Exception as e:
+        logger.error(f"Error fetching new commits: {e}")
+        return []
\ No newline at end of file
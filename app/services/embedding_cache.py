@@ -0,0 +1,116 @@
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import Dict, List
+from app.config.settings import settings
+from app.logger.logger import logger
+from app.services.sqlite_cache import SqliteCache
+
+# SQLite caps the number of bound parameters per statement
+_LOOKUP_BATCH_SIZE = 500
+# Recently used embeddings are also kept in memory to skip SQLite on hot keys
+_MEMORY_CACHE_SIZE = 10000
+
+def _drop_float32_table(connection: sqlite3.Connection) -> None:
+    # Vectors are stored as float16, halving the cache size; the float32 table they replaced is
+    # dropped once, and user_version records that the database has been migrated
+    if connection.execute("PRAGMA user_version").fetchone()[0] < 1:
+        connection.execute("DROP TABLE IF EXISTS embedding_vectors")
+        connection.execute("PRAGMA user_version = 1")
+
+_cache = SqliteCache(
+    settings.EMBEDDING_CACHE_PATH,
+    "embedding_vectors_f16",
+    ("key BLOB PRIMARY KEY", "vector BLOB NOT NULL"),
+    settings.EMBEDDING_CACHE_MAX_ENTRIES,
+    setup=_drop_float32_table,
+)
+_memory_lock = threading.Lock()
+_memory_cache: "OrderedDict[bytes, np.ndarray]" = OrderedDict()
+
+def _remember(key: bytes, vector: np.ndarray) -> None:
+    _memory_cache[key] = vector
+    _memory_cache.move_to_end(key)
+    if len(_memory_cache) > _MEMORY_CACHE_SIZE:
+        _memory_cache.popitem(last=False)
+
+def to_stored_precision(vector: np.ndarray) -> np.ndarray:
+    """
+    Round an embedding to the precision it is cached at.
+
+    Vectors are cached as float16, which keeps about three significant digits; fresh embeddings
+    are rounded the same way so a cache hit returns exactly what the original request returned.
+
+    Args:
+        vector: The embedding
+
+    Returns:
+        The embedding rounded through float16, as a float32 vector
+    """
+    return np.asarray(vector, dtype=np.float16).astype(np.float32)
+
+def embedding_key(model: str, text: str) -> bytes:
+    """
+    Compute the cache key for a text embedded with a given model.
+
+    Args:
+        model: The name of the embedding model
+        text: The embedded text
+
+    Returns:
+        A 16-byte digest identifying the model and text
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(model.encode())
+    digest.update(b"\0")
+    digest.update(text.encode())
+    return digest.digest()
+
+def get_cached_embeddings(keys: List[bytes]) -> Dict[bytes, np.ndarray]:
+    """
+    Get cached embeddings for the given keys.
+
+    Args:
+        keys: The cache keys to look up
+
+    Returns:
+        A mapping from key to embedding for every key found in the cache
+    """
+    found = {}
+    try:
+        with _memory_lock:
+            for key in keys:
+                if key in _memory_cache:
+                    _memory_cache.move_to_end(key)
+                    found[key] = _memory_cache[key]
+        
+        missing = [key for key in keys if key not in found]
+        for i in range(0, len(missing), _LOOKUP_BATCH_SIZE):
+            batch = missing[i:i + _LOOKUP_BATCH_SIZE]
+            placeholders = ",".join("?" * len(batch))
+            rows = _cache.fetch(f"SELECT key, vector FROM embedding_vectors_f16 WHERE key IN ({placeholders})", batch)
+            with _memory_lock:
+                for key, vector in rows:
+                    found[key] = np.frombuffer(vector, dtype=np.float16).astype(np.float32)
+                    _remember(key, found[key])
+    except Exception as e:
+        logger.error(f"Error reading embeddings from cache: {e}")
+    return found
+
+def cache_embeddings(embeddings: Dict[bytes, np.ndarray]) -> None:
+    """
+    Store embeddings in the cache. Callers should round the embeddings with
+    to_stored_precision first so fresh and cached values agree.
+
+    Args:
+        embeddings: A mapping from cache key to embedding
+    """
+    try:
+        with _memory_lock:
+            for key, vector in embeddings.items():
+                _remember(key, to_stored_precision(vector))
+        _cache.store([(key, np.asarray(vector, dtype=np.float16).tobytes()) for key, vector in embeddings.items()])
+    except Exception as e:
+        logger.error(f"Error writing embeddings to cache: {e}")
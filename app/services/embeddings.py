@@ -1,46 +1,154 @@
 import os
+import asyncio
+import random
+import time
+import hashlib
+import numpy as np
 from google import genai
 from app.logger.logger import logger
 from app.config.settings import settings
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Set
 from app.models.models_commit import Commit, SubCommitAnalysis, SubCommitNeighbors
 from app.models.models_AI import Document
 from app.services.chromadb_service import insert_document, get_k_neighbors
+from app.services import embedding_cache
 
-class EmbeddingModel:
-    _instance = None
-    _client = None
+EMBEDDING_MODEL = "text-embedding-004"
+EMBEDDING_BATCH_SIZE = 100
+QUERY_BATCH_MAX_SIZE = 32
 
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super().__new__(cls)
-            cls._client = genai.Client(api_key=settings.GOOGLE_API_KEY)
-        return cls._instance
+class EmbeddingModel:
+    def __init__(self):
+        self._client = genai.Client(api_key=settings.GOOGLE_API_KEY)
+        self._semaphore = asyncio.Semaphore(settings.EMBEDDING_CONCURRENCY)
 
-    async def get_embedding(self, texts: list[str]) -> list[float]:
-        try:
-            response = self._client.models.embed_content(
-                model="text-embedding-004",
+    async def _embed_batch(self, texts: list[str]):
+        async with self._semaphore:
+            # Spread out simultaneous batches so they don't all hit the rate limit at once
+            await asyncio.sleep(random.uniform(0, 0.05))
+            return await self._client.aio.models.embed_content(
+                model=EMBEDDING_MODEL,
                 contents=texts,
             )
-            return response.embeddings[0].values
+
+    async def get_embedding(self, texts: list[str]) -> list[np.ndarray]:
+        try:
+            # Batch texts of similar length together so short texts don't wait on long ones
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+            sorted_texts = [texts[i] for i in order]
+            
+            # The embedding endpoint caps the number of inputs per request
+            responses = await asyncio.gather(*[
+                self._embed_batch(sorted_texts[i:i + EMBEDDING_BATCH_SIZE])
+                for i in range(0, len(sorted_texts), EMBEDDING_BATCH_SIZE)
+            ])
+            # One contiguous float32 matrix per response; its rows are the embeddings
+            sorted_embeddings = [
+                row
+                for response in responses
+                for row in np.array([embedding.values for embedding in response.embeddings], dtype=np.float32)
+            ]
+            if len(sorted_embeddings) != len(texts):
+                logger.error(f"Received {len(sorted_embeddings)} embeddings for {len(texts)} texts")
+                return []
+            
+            # Restore the input order
+            embeddings = [None] * len(texts)
+            for i, embedding in zip(order, sorted_embeddings):
+                embeddings[i] = embedding
+            return embeddings
         except Exception as e:
             logger.error(f"Error generating embedding: {e}")
             return []
 
 embedding_model = EmbeddingModel()
 
-async def get_text_embedding(texts: list[str]) -> list[float]:
+async def get_text_embedding(texts: list[str]) -> list[np.ndarray]:
+    """
+    Generates text embeddings for the given texts using the Gemini API.
+    Embeddings are cached by content hash, so only texts that have not been
+    embedded before are sent to the API.
+
+    Args:
+        texts: The texts to embed.
+
+    Returns:
+        One float32 embedding vector per input text, in the same order, rounded to float16 precision.
+    """
+    keys = [embedding_cache.embedding_key(EMBEDDING_MODEL, text) for text in texts]
+    cached = await asyncio.to_thread(embedding_cache.get_cached_embeddings, list(set(keys)))
+    
+    # Embed each distinct uncached text only once
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in cached:
+            missing.setdefault(key, text)
+    
+    if missing:
+        embeddings = await embedding_model.get_embedding(list(missing.values()))
+        if len(embeddings) != len(missing):
+            return []
+        # Rounded to the cache's float16 precision so later cache hits return the same values
+        new_embeddings = {key: embedding_cache.to_stored_precision(embedding) for key, embedding in zip(missing.keys(), embeddings)}
+        await asyncio.to_thread(embedding_cache.cache_embeddings, new_embeddings)
+        cached.update(new_embeddings)
+    
+    return [cached[key] for key in keys]
+
+# Recent text searches, keyed by (collection, k, text hash); dropped when their collection changes
+SIMILAR_CACHE_TTL_SECONDS = 60
+SIMILAR_CACHE_MAX_ENTRIES = 1024
+_similar_cache: Dict[Tuple[str, int, bytes], Tuple[float, SubCommitNeighbors]] = {}
+
+def _invalidate_similar_cache(collection_name: str) -> None:
+    for key in [key for key in _similar_cache if key[0] == collection_name]:
+        del _similar_cache[key]
+
+# Search queries waiting to be embedded together, and the in-flight batches embedding them
+_pending_queries: List[Tuple[str, asyncio.Future]] = []
+_query_batch_tasks: Set[asyncio.Task] = set()
+
+async def _embed_query_batch(batch: List[Tuple[str, asyncio.Future]]) -> None:
+    try:
+        embeddings = await get_text_embedding([text for text, _ in batch])
+    except Exception as e:
+        embeddings = []
+        logger.error(f"Error embedding batch of {len(batch)} queries: {e}")
+    
+    for i, (_, future) in enumerate(batch):
+        if not future.done():
+            future.set_result(embeddings[i] if len(embeddings) == len(batch) else None)
+
+def _flush_pending_queries() -> None:
+    if not _pending_queries:
+        return
+    batch = _pending_queries.copy()
+    _pending_queries.clear()
+    task = asyncio.create_task(_embed_query_batch(batch))
+    _query_batch_tasks.add(task)
+    task.add_done_callback(_query_batch_tasks.discard)
+
+async def get_query_embedding(text: str) -> Optional[np.ndarray]:
     """
-    Generates a text embedding for the given text using the Gemini API.
+    Generates the embedding for a single search query.
+    Queries arriving within QUERY_BATCH_MAX_WAIT_MS of each other share one embedding request.
 
     Args:
-        text: The text to embed.
+        text: The query text to embed.
 
     Returns:
-        A list of floats representing the embedding.
+        The query's embedding vector, or None if it could not be generated.
     """
-    return await embedding_model.get_embedding(texts)
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    _pending_queries.append((text, future))
+    
+    if len(_pending_queries) >= QUERY_BATCH_MAX_SIZE:
+        _flush_pending_queries()
+    elif len(_pending_queries) == 1:
+        loop.call_later(settings.QUERY_BATCH_MAX_WAIT_MS / 1000, _flush_pending_queries)
+    
+    return await future
 
 def create_subcommit_text(subcommit: SubCommitAnalysis) -> str:
     """
@@ -59,57 +167,72 @@ def create_subcommit_text(subcommit: SubCommitAnalysis) -> str:
         f"Type: {subcommit.type.value}"
     ]
     
-    # Add file information
-    file_texts = []
-    for file in subcommit.files:
-        file_text = f"File: {file.filename}"
-        if file.patch:
-            file_text += f", Patch: {file.patch}"
-        file_texts.append(file_text)
-    
-    if file_texts:
-        text_parts.append("Files: " + " | ".join(file_texts))
+    # Add file information, joining the pieces once instead of concatenating per file
+    if subcommit.files:
+        file_parts = ["Files: "]
+        for file in subcommit.files:
+            file_parts.append(f"File: {file.filename}")
+            if file.patch:
+                patch = file.patch[:settings.EMBEDDING_MAX_PATCH_LENGTH] if settings.EMBEDDING_MAX_PATCH_LENGTH else file.patch
+                file_parts.append(f", Patch: {patch}")
+            file_parts.append(" | ")
+        file_parts.pop()
+        text_parts.append("".join(file_parts))
     
     return "\n".join(text_parts)
 
-async def vectorize_subcommit(subcommit: SubCommitAnalysis) -> Document:
+async def vectorize_subcommits(subcommits: List[SubCommitAnalysis]) -> List[Document]:
     """
-    Vectorize a subcommit by creating a text representation and generating an embedding.
+    Vectorize subcommits by creating their text representations and embedding them in one request.
     
     Args:
-        subcommit: The subcommit to vectorize
+        subcommits: The subcommits to vectorize
         
     Returns:
-        A Document containing the subcommit's vector representation
+        One Document per subcommit, in the same order
     """
-    # Create text representation
-    text = create_subcommit_text(subcommit)
+    # Create text representations
+    texts = [create_subcommit_text(subcommit) for subcommit in subcommits]
     
-    # Generate embedding
-    embedding = await get_text_embedding([text])
+    # Generate all embeddings with a single call
+    embeddings = await get_text_embedding(texts)
     
-    if not embedding:
-        raise ValueError("Failed to generate embedding for subcommit")
+    if len(embeddings) != len(subcommits):
+        raise ValueError("Failed to generate embeddings for subcommits")
     
-    # Create metadata
-    metadata = {
-        "commit_sha": subcommit.commit_sha,
-        "title": subcommit.title,
-        "type": subcommit.type.value,
-    }
-    
-    # Create a unique ID for the subcommit
-    # Using title as part of ID to make it more meaningful
-    subcommit_id = f"{subcommit.commit_sha}_{subcommit.title.replace(' ', '_')[:30]}"
+    documents = []
+    for subcommit, embedding in zip(subcommits, embeddings):
+        # Create metadata
+        metadata = {
+            "commit_sha": subcommit.commit_sha,
+            "title": subcommit.title,
+            "type": subcommit.type.value,
+        }
+        
+        # Create a unique ID for the subcommit
+        # Hashing the title keeps IDs short and stops similar titles from colliding
+        subcommit_id = f"{subcommit.commit_sha}_{hashlib.blake2b(subcommit.title.encode(), digest_size=8).hexdigest()}"
+        
+        documents.append(Document(
+            vector=embedding,
+            subcommit_id=subcommit_id,
+            metadata=metadata
+        ))
     
-    # Create document
-    document = Document(
-        vector=embedding[0],  # First element since we only sent one text
-        subcommit_id=subcommit_id,
-        metadata=metadata
-    )
+    return documents
+
+async def vectorize_subcommit(subcommit: SubCommitAnalysis) -> Document:
+    """
+    Vectorize a subcommit by creating a text representation and generating an embedding.
     
-    return document
+    Args:
+        subcommit: The subcommit to vectorize
+        
+    Returns:
+        A Document containing the subcommit's vector representation
+    """
+    documents = await vectorize_subcommits([subcommit])
+    return documents[0]
 
 async def store_subcommit_vector(subcommit: SubCommitAnalysis, collection_name: str = "default") -> Dict[str, Any]:
     """
@@ -123,7 +246,8 @@ async def store_subcommit_vector(subcommit: SubCommitAnalysis, collection_name:
         A dictionary containing the status of the operation
     """
     document = await vectorize_subcommit(subcommit)
-    result = insert_document(document, collection_name)
+    result = insert_document([document], collection_name)
+    _invalidate_similar_cache(collection_name)
     return result
 
 async def populate_collection(collection_name: str, subcommits: List[SubCommitAnalysis]) -> Dict[str, Any]:
@@ -140,21 +264,31 @@ async def populate_collection(collection_name: str, subcommits: List[SubCommitAn
     try:
         logger.info(f"Populating collection '{collection_name}' with {len(subcommits)} subcommits")
         
-        documents = []
-        for subcommit in subcommits:
+        # Embedded chunks are inserted as soon as they are ready, so ChromaDB writes
+        # overlap with the embedding requests still in flight
+        chunks = [subcommits[i:i + EMBEDDING_BATCH_SIZE] for i in range(0, len(subcommits), EMBEDDING_BATCH_SIZE)]
+        queue: asyncio.Queue = asyncio.Queue(maxsize=32)
+        
+        async def embed_chunk(chunk: List[SubCommitAnalysis]) -> None:
             try:
-                document = await vectorize_subcommit(subcommit)
-                documents.append(document)
+                documents = await vectorize_subcommits(chunk)
             except Exception as e:
-                logger.error(f"Error vectorizing subcommit {subcommit.commit_sha}: {e}")
+                logger.error(f"Error vectorizing subcommits for collection '{collection_name}': {e}")
+                documents = []
+            await queue.put(documents)
         
-        # Insert all documents into the collection
-        results = []
-        for document in documents:
-            result = insert_document(document, collection_name)
-            results.append(result)
+        async def insert_chunks() -> int:
+            inserted_count = 0
+            for _ in chunks:
+                documents = await queue.get()
+                if not documents:
+                    continue
+                result = await asyncio.to_thread(insert_document, documents, collection_name)
+                inserted_count += result.get("inserted_count", 0)
+            return inserted_count
         
-        success_count = sum(1 for r in results if not r.get("error"))
+        *_, success_count = await asyncio.gather(*[embed_chunk(chunk) for chunk in chunks], insert_chunks())
+        _invalidate_similar_cache(collection_name)
         
         return {
             "message": f"Successfully populated collection '{collection_name}' with {success_count}/{len(subcommits)} subcommits",
@@ -185,22 +319,14 @@ async def find_similar_subcommits(subcommit: SubCommitAnalysis, k: int = 5, coll
     # Find k nearest neighbors using the working get_k_neighbors function
     neighbors = get_k_neighbors(collection_name, document.vector, k)
     
-    # Get all commit analyses from Supabase
-    from app.services.supabase_service import get_commit_analysis
-    
-    # Convert neighbors to SubCommitAnalysis objects
-    similar_subcommits = []
+    # Get the complete analyses of all neighbors from Supabase in one query
+    from app.services.supabase_service import get_commit_analyses_bulk
     
-    for neighbor in neighbors:
-        # Extract metadata from the neighbor
-        subcommit_id = neighbor.subcommit_id
-        
-        # Use the complete analysis from Supabase
-        similar_subcommit = get_commit_analysis(subcommit_id)
-        similar_subcommits.append(similar_subcommit)
+    neighbor_ids = [neighbor["subcommit_id"] for neighbor in neighbors.get("results", [])]
+    analyses_result = await asyncio.to_thread(get_commit_analyses_bulk, neighbor_ids)
         
     # Return the neighbors
-    return SubCommitNeighbors(subcommits=similar_subcommits)
+    return SubCommitNeighbors(subcommits=analyses_result.get("data", []))
 
 async def find_similar_commits_by_text(text: str, k: int = 5, collection_name: str = "default") -> SubCommitNeighbors:
     """
@@ -215,32 +341,35 @@ async def find_similar_commits_by_text(text: str, k: int = 5, collection_name: s
         A SubCommitNeighbors object containing the similar subcommits
     """
     try:
+        cache_key = (collection_name, k, embedding_cache.embedding_key(EMBEDDING_MODEL, text))
+        cached = _similar_cache.get(cache_key)
+        if cached and time.monotonic() - cached[0] < SIMILAR_CACHE_TTL_SECONDS:
+            return cached[1]
+        
         # Generate embedding for the input text
-        embedding = await get_text_embedding([text])
+        embedding = await get_query_embedding(text)
         
-        if not embedding:
+        if embedding is None:
             logger.error("Failed to generate embedding for input text")
             return SubCommitNeighbors(subcommits=[])
         
         # Find k nearest neighbors using the embedding
-        neighbors = get_k_neighbors(collection_name, embedding[0], k)
+        neighbors = get_k_neighbors(collection_name, embedding, k)
         
-        # Get commit analyses from Supabase
-        from app.services.supabase_service import get_commit_analysis
+        # Get the complete analyses of all neighbors from Supabase in one query
+        from app.services.supabase_service import get_commit_analyses_bulk
         
-        # Convert neighbors to SubCommitAnalysis objects
-        similar_subcommits = []
+        neighbor_ids = [neighbor["subcommit_id"] for neighbor in neighbors.get("results", [])]
+        analyses_result = await asyncio.to_thread(get_commit_analyses_bulk, neighbor_ids)
+        similar = SubCommitNeighbors(subcommits=analyses_result.get("data", []))
         
-        for neighbor in neighbors:
-            # Extract subcommit_id from the neighbor
-            subcommit_id = neighbor.subcommit_id
-            
-            # Use the complete analysis from Supabase
-            similar_subcommit = get_commit_analysis(subcommit_id)
-            similar_subcommits.append(similar_subcommit)
+        if "error" not in neighbors and "error" not in analyses_result:
+            if len(_similar_cache) >= SIMILAR_CACHE_MAX_ENTRIES:
+                _similar_cache.pop(next(iter(_similar_cache)))
+            _similar_cache[cache_key] = (time.monotonic(), similar)
         
         # Return the neighbors
-        return SubCommitNeighbors(subcommits=similar_subcommits)
+        return similar
     
     except Exception as e:
         logger.error(f"Error finding similar commits by text: {e}")
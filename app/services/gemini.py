@@ -1,20 +1,28 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
-from app.models.models_commit import ChatResponse, Epic, SubCommitAnalysisList, Commit, SubCommitNeighbors, SubCommitAnalysis, SubCommitFileAnalysis
+from app.models.models_commit import ChatResponse, Epic, SubCommitAnalysisList, Commit, SubCommitNeighbors, SubCommitAnalysis
 from app.config.settings import settings
 from app.prompts.system_prompt import (
     format_commit_analysis_prompt, 
+    format_batch_commit_analysis_prompt,
     format_epic_analysis_prompt, 
-    format_subcommit_neighbors_prompt,
-    format_subcommit_files_prompt
+    format_subcommit_neighbors_prompt
 )
 from app.logger.logger import logger
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type, retry_if_result
+from app.services import analysis_cache
+from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_not_exception_type, retry_if_result
+from langchain_core.exceptions import OutputParserException
+from pydantic import ValidationError
 import asyncio
 import uuid
 from typing import List, Dict, Any
 
-# Add a simple cache to avoid duplicate commit analysis
-_commit_analysis_cache = {}
+# Number of commits analyzed together in one LLM request
+COMMITS_PER_ANALYSIS_REQUEST = 4
+# Shared by every analysis batch so concurrent requests can't pile up past Gemini's rate limits
+_llm_semaphore = asyncio.Semaphore(settings.LLM_CONCURRENCY)
+
+# Malformed structured output already went through the fallback model; waiting to retry it won't help
+NON_RETRYABLE_ERRORS = (OutputParserException, ValidationError)
 
 def is_empty_analysis(result: SubCommitAnalysisList) -> bool:
     """Check if the analysis result is empty or contains no analysis."""
@@ -33,11 +41,6 @@ model_structured_chat_response = gemini_2_0_flash.with_structured_output(ChatRes
 model_structured_chat_response_fallback = gemini_1_5_pro.with_structured_output(ChatResponse)
 model_chat_response_with_fallback = model_structured_chat_response.with_fallbacks([model_structured_chat_response_fallback])
 
-# Create models for file analysis
-model_structured_file_analysis = gemini_2_0_flash.with_structured_output(SubCommitFileAnalysis)
-model_structured_file_analysis_fallback = gemini_1_5_pro.with_structured_output(SubCommitFileAnalysis)
-model_file_analysis_with_fallback = model_structured_file_analysis.with_fallbacks([model_structured_file_analysis_fallback])
-
 model_structured_subcommit_neighbors = gemini_2_0_flash.with_structured_output(SubCommitNeighbors)
 model_structured_subcommit_neighbors_fallback = gemini_1_5_pro.with_structured_output(SubCommitNeighbors)
 model_neighbors_with_fallback = model_structured_subcommit_neighbors.with_fallbacks([model_structured_subcommit_neighbors_fallback])
@@ -49,29 +52,24 @@ model_epic_with_fallback = model_structured_epic_analysis.with_fallbacks([model_
 @retry(
     stop=stop_after_attempt(settings.retries),
     wait=wait_exponential(multiplier=1, min=4, max=10),
-    retry=retry_if_exception_type(Exception) | retry_if_result(is_empty_analysis),
+    retry=retry_if_not_exception_type(NON_RETRYABLE_ERRORS) | retry_if_result(is_empty_analysis),
     reraise=True
 )
 async def get_commit_analysis(commit: Commit) -> SubCommitAnalysisList:
     # Check if we've already analyzed this commit
-    if commit.sha in _commit_analysis_cache:
+    cached_analysis = await asyncio.to_thread(analysis_cache.get_cached_analysis, commit.sha)
+    if cached_analysis is not None:
         logger.info(f"Using cached analysis for commit: {commit.sha}")
-        return _commit_analysis_cache[commit.sha]
+        return cached_analysis
         
     logger.info(f"Analyzing commit: {commit.sha}")
     formatted_prompt = format_commit_analysis_prompt(commit)
-    logger.debug(f"Formatted prompt for commit analysis: {formatted_prompt}")
+    logger.debug("Formatted prompt for commit analysis: %s", formatted_prompt)
     try:
+        # An empty result is retried by tenacity, so there is no extra fallback call here
         analysis_result: SubCommitAnalysisList = await model_commit_with_fallback.ainvoke(
             formatted_prompt
         )
-        
-        # If Gemini returns None, try fallback model directly
-        if analysis_result is None:
-            logger.warning(f"Gemini returned None for commit {commit.sha}. Trying fallback model directly...")
-            analysis_result = await model_structured_commit_analysis_fallback.ainvoke(
-                formatted_prompt
-            )
     except Exception as e:
         logger.error(f"Failed to analyze commit {commit.sha}: {str(e)}")
         logger.error(f"AI Error details: {repr(e)}")
@@ -88,74 +86,99 @@ async def get_commit_analysis(commit: Commit) -> SubCommitAnalysisList:
     for subcommit in analysis_result.analysis:
         subcommit.commit_sha = commit.sha
     
-    # Only perform file analysis if the commit has files
-    if commit.files and len(commit.files) > 0:
-        # Now perform file analysis for each subcommit
-        file_analysis_tasks = [get_subcommit_file_analysis(commit, subcommit) for subcommit in analysis_result.analysis]
-        file_analysis_results = await asyncio.gather(*file_analysis_tasks, return_exceptions=True)
-        
-        # Assign files to each subcommit
-        for i, result in enumerate(file_analysis_results):
-            if isinstance(result, Exception):
-                logger.error(f"Error analyzing files for subcommit {analysis_result.analysis[i].title}: {str(result)}, AI Error: {result}")
-            else:
-                analysis_result.analysis[i].files = result.files
-    else:
-        logger.warning(f"Commit {commit.sha} has no files, skipping file analysis")
+    attach_commit_files(commit, analysis_result.analysis)
     
     # Cache the result before returning
-    _commit_analysis_cache[commit.sha] = analysis_result
+    await asyncio.to_thread(analysis_cache.cache_analysis, commit.sha, analysis_result)
     
     return analysis_result
 
+def attach_commit_files(commit: Commit, subcommits: List[SubCommitAnalysis]) -> None:
+    """
+    Replace the files the model assigned to each subcommit with the matching fetched files.
+    
+    The model assigns files by name in the analysis call; stats and patches should come
+    from GitHub rather than from the model's copy of them.
+    
+    Args:
+        commit: The analyzed commit
+        subcommits: The subcommits identified within the commit
+    """
+    files_by_name = {file.filename: file for file in commit.files}
+    for subcommit in subcommits:
+        subcommit.files = [files_by_name[file.filename] for file in subcommit.files if file.filename in files_by_name]
+
 @retry(
     stop=stop_after_attempt(settings.retries),
     wait=wait_exponential(multiplier=1, min=4, max=10),
-    retry=retry_if_exception_type(Exception),
+    retry=retry_if_not_exception_type(NON_RETRYABLE_ERRORS) | retry_if_result(is_empty_analysis),
     reraise=True
 )
-async def get_subcommit_file_analysis(commit: Commit, subcommit: SubCommitAnalysis) -> SubCommitFileAnalysis:
+async def _analyze_commit_group(commits: List[Commit]) -> SubCommitAnalysisList:
+    formatted_prompt = format_batch_commit_analysis_prompt(commits)
+    logger.debug("Formatted prompt for batch commit analysis: %s", formatted_prompt)
+    try:
+        # An empty result is retried by tenacity, so there is no extra fallback call here
+        analysis_result: SubCommitAnalysisList = await model_commit_with_fallback.ainvoke(
+            formatted_prompt
+        )
+    except Exception as e:
+        logger.error(f"Failed to analyze a batch of {len(commits)} commits: {str(e)}")
+        logger.error(f"AI Error details: {repr(e)}")
+        raise  # Re-raise to trigger retry
+    
+    return analysis_result
+
+async def get_commit_group_analysis(commits: List[Commit]) -> List[SubCommitAnalysisList]:
     """
-    Analyze which files from the commit belong to a specific subcommit.
+    Analyze several commits with a single LLM request.
+    
+    Cached analyses are reused, and commits the model left out of the batched answer
+    are analyzed on their own.
     
     Args:
-        commit: The original commit containing all files
-        subcommit: The subcommit to analyze for file relevance
+        commits: The commits to analyze
         
     Returns:
-        SubCommitFileAnalysis with the list of files relevant to this subcommit
+        One SubCommitAnalysisList per commit, in the same order
     """
-    # Safety check - ensure commit has files
-    if not commit.files or len(commit.files) == 0:
-        logger.warning(f"No files to analyze for subcommit: {subcommit.title}")
-        return SubCommitFileAnalysis(files=[])
-        
-    logger.info(f"Analyzing files for subcommit: {subcommit.title}")
-    formatted_prompt = format_subcommit_files_prompt(commit, subcommit)
-    logger.debug(f"Formatted prompt for subcommit file analysis: {formatted_prompt}")
+    cached_analyses = await asyncio.gather(*[asyncio.to_thread(analysis_cache.get_cached_analysis, commit.sha) for commit in commits])
+    analyses = dict(zip([commit.sha for commit in commits], cached_analyses))
+    uncached_commits = [commit for commit in commits if analyses[commit.sha] is None]
     
-    try:
-        file_analysis_result = await model_file_analysis_with_fallback.ainvoke(
-            formatted_prompt
-        )
+    if len(uncached_commits) > 1:
+        logger.info(f"Analyzing {len(uncached_commits)} commits in one request")
+        subcommits_by_sha: Dict[str, List[SubCommitAnalysis]] = {}
+        try:
+            group_result = await _analyze_commit_group(uncached_commits)
+            for subcommit in group_result.analysis:
+                subcommits_by_sha.setdefault(subcommit.commit_sha, []).append(subcommit)
+        except Exception as e:
+            logger.error(f"Batched analysis failed, analyzing commits individually: {str(e)}")
         
-        # If Gemini returns None, try fallback model directly
-        if file_analysis_result is None:
-            logger.warning(f"Gemini returned None for file analysis of subcommit {subcommit.title}. Trying fallback model directly...")
-            file_analysis_result = await model_structured_file_analysis_fallback.ainvoke(
-                formatted_prompt
-            )
-    except Exception as e:
-        logger.error(f"Failed to analyze files for subcommit {subcommit.title}: {str(e)}")
-        logger.error(f"AI Error details: {repr(e)}")
-        raise  # Re-raise to trigger retry
+        for commit in uncached_commits:
+            subcommits = subcommits_by_sha.get(commit.sha)
+            if subcommits:
+                attach_commit_files(commit, subcommits)
+                analyses[commit.sha] = SubCommitAnalysisList(analysis=subcommits)
+                await asyncio.to_thread(analysis_cache.cache_analysis, commit.sha, analyses[commit.sha])
+    
+    # Anything still missing goes through the single-commit path
+    missing_commits = [commit for commit in commits if analyses[commit.sha] is None]
+    if missing_commits:
+        missing_results = await asyncio.gather(*[get_commit_analysis(commit) for commit in missing_commits], return_exceptions=True)
+        for commit, result in zip(missing_commits, missing_results):
+            if isinstance(result, Exception):
+                logger.error(f"Error analyzing commit {commit.sha}: {str(result)}")
+            else:
+                analyses[commit.sha] = result
     
-    logger.info(f"Successfully analyzed files for subcommit: {subcommit.title}")
-    return file_analysis_result
+    return [analyses[commit.sha] for commit in commits]
 
 async def analyze_commits_batch(commits: List[Commit]) -> List[SubCommitAnalysis]:
     """
-    Analyze a batch of commits concurrently using asyncio.gather
+    Analyze a batch of commits, packing COMMITS_PER_ANALYSIS_REQUEST commits into each LLM request
+    and sending the requests concurrently using asyncio.gather
     
     Args:
         commits: List of Commit objects to analyze
@@ -165,24 +188,31 @@ async def analyze_commits_batch(commits: List[Commit]) -> List[SubCommitAnalysis
     """
     logger.info(f"Starting concurrent analysis of {len(commits)} commits")
     
-    # Create tasks for each commit
-    tasks = [get_commit_analysis(commit) for commit in commits]
+    async def analyze_group(group: List[Commit]) -> List[SubCommitAnalysisList]:
+        async with _llm_semaphore:
+            return await get_commit_group_analysis(group)
+    
+    # Create tasks for each group of commits
+    groups = [commits[i:i + COMMITS_PER_ANALYSIS_REQUEST] for i in range(0, len(commits), COMMITS_PER_ANALYSIS_REQUEST)]
+    tasks = [analyze_group(group) for group in groups]
     
-    # Execute all tasks concurrently
-    results = await asyncio.gather(*tasks, return_exceptions=True)
+    # Execute all tasks concurrently; a failing group must not discard the others
+    group_results = await asyncio.gather(*tasks, return_exceptions=True)
     
     # Process results
     all_analyses = []
-    for i, result in enumerate(results):
-        if isinstance(result, Exception):
-            logger.error(f"Error analyzing commit {commits[i].sha}: {str(result)}")
-            logger.error(f"AI Error details: {repr(result)}")
-        elif result and result.analysis:
-            all_analyses.extend(result.analysis)
-        else:
-            logger.warning(f"No analyses generated for commit: {commits[i].sha}")
-            if result:
-                logger.error(f"Empty result details: {repr(result)}")
+    for group, group_result in zip(groups, group_results):
+        if isinstance(group_result, Exception):
+            logger.error(f"Error analyzing commits {', '.join(commit.sha for commit in group)}: {str(group_result)}")
+            logger.error(f"AI Error details: {repr(group_result)}")
+            continue
+        for commit, result in zip(group, group_result):
+            if result and result.analysis:
+                all_analyses.extend(result.analysis)
+            else:
+                logger.warning(f"No analyses generated for commit: {commit.sha}")
+                if result:
+                    logger.error(f"Empty result details: {repr(result)}")
     
     logger.info(f"Completed concurrent analysis, generated {len(all_analyses)} analyses")
     return all_analyses
@@ -190,13 +220,13 @@ async def analyze_commits_batch(commits: List[Commit]) -> List[SubCommitAnalysis
 @retry(
     stop=stop_after_attempt(settings.retries),
     wait=wait_exponential(multiplier=1, min=4, max=10),
-    retry=retry_if_exception_type(Exception),
+    retry=retry_if_not_exception_type(NON_RETRYABLE_ERRORS),
     reraise=True
 )
 async def get_epic_analysis(neighbors: SubCommitNeighbors) -> Epic:
     logger.info(f"Analyzing epic based on {len(neighbors.neighbors)} neighbors")
     formatted_prompt = format_epic_analysis_prompt(neighbors)
-    logger.debug(f"Formatted prompt for epic analysis: {formatted_prompt}")
+    logger.debug("Formatted prompt for epic analysis: %s", formatted_prompt)
     
     try:
         epic_result = await model_epic_with_fallback.ainvoke(
@@ -220,13 +250,13 @@ async def get_epic_analysis(neighbors: SubCommitNeighbors) -> Epic:
 @retry(
     stop=stop_after_attempt(settings.retries),
     wait=wait_exponential(multiplier=1, min=4, max=10),
-    retry=retry_if_exception_type(Exception),
+    retry=retry_if_not_exception_type(NON_RETRYABLE_ERRORS),
     reraise=True
 )
 async def get_subcommit_neighbors_analysis(subcommit_analysis: SubCommitAnalysis) -> SubCommitNeighbors:
     logger.info(f"Analyzing subcommit neighbors for: {subcommit_analysis.title}")
     formatted_prompt = format_subcommit_neighbors_prompt(subcommit_analysis)
-    logger.debug(f"Formatted prompt for subcommit neighbors analysis: {formatted_prompt}")
+    logger.debug("Formatted prompt for subcommit neighbors analysis: %s", formatted_prompt)
     
     try:
         neighbors_result = await model_neighbors_with_fallback.ainvoke(
@@ -250,7 +280,7 @@ async def get_subcommit_neighbors_analysis(subcommit_analysis: SubCommitAnalysis
 @retry(
     stop=stop_after_attempt(settings.retries),
     wait=wait_exponential(multiplier=1, min=4, max=10),
-    retry=retry_if_exception_type(Exception),
+    retry=retry_if_not_exception_type(NON_RETRYABLE_ERRORS),
     reraise=True
 )
 async def answer_user_query_with_subcommits(subcommits: List[Dict[str, Any]], user_query: str) -> ChatResponse:
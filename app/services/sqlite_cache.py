@@ -0,0 +1,88 @@
+import os
+import sqlite3
+import threading
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+# An overflowing cache is trimmed to this fraction of its size, so eviction runs once per batch of writes
+EVICTION_TARGET = 0.9
+
+class SqliteCache:
+    """
+    A size-bounded SQLite table backing one of the on-disk caches.
+
+    The database is opened on first use, so importing a cache module creates no files.
+    """
+
+    def __init__(self, path: str, table: str, columns: Tuple[str, ...], max_entries: int, setup: Optional[Callable[[sqlite3.Connection], None]] = None):
+        """
+        Args:
+            path: The SQLite database file
+            table: The table holding the cache entries
+            columns: The table's column definitions, in insertion order
+            max_entries: The number of entries kept before the oldest writes are evicted
+            setup: Called with the connection when the database is first opened, before the table is created
+        """
+        self.path = path
+        self.table = table
+        self.columns = columns
+        self.max_entries = max_entries
+        self._setup = setup
+        self._connection: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # Callers hold the lock
+        if self._connection is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            if self._setup:
+                self._setup(connection)
+            connection.execute(f"CREATE TABLE IF NOT EXISTS {self.table} ({', '.join(self.columns)})")
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def fetch(self, query: str, params: Sequence[Any] = ()) -> List[Tuple[Any, ...]]:
+        """
+        Run a read query against the cache.
+
+        Args:
+            query: The SELECT statement
+            params: The statement's parameters
+
+        Returns:
+            The rows returned by the query
+        """
+        with self._lock:
+            return self._connect().execute(query, params).fetchall()
+
+    def store(self, rows: Iterable[Sequence[Any]]) -> None:
+        """
+        Insert or replace rows, then evict the oldest writes beyond max_entries.
+
+        Args:
+            rows: Values for every column, in the order of `columns`
+        """
+        placeholders = ", ".join("?" * len(self.columns))
+        with self._lock:
+            connection = self._connect()
+            # Take the write lock up front so the insert, the count and the eviction see no other writer
+            connection.execute("BEGIN IMMEDIATE")
+            try:
+                connection.executemany(f"INSERT OR REPLACE INTO {self.table} VALUES ({placeholders})", rows)
+                self._evict(connection)
+                connection.commit()
+            except BaseException:
+                connection.rollback()
+                raise
+
+    def _evict(self, connection: sqlite3.Connection) -> None:
+        # Bound the cache by evicting the oldest writes; callers hold the lock and the write transaction.
+        # The table is shared with other processes, so the row count is read here rather than tracked
+        row_count = connection.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        if row_count <= self.max_entries:
+            return
+        excess = row_count - int(self.max_entries * EVICTION_TARGET)
+        connection.execute(
+            f"DELETE FROM {self.table} WHERE rowid IN (SELECT rowid FROM {self.table} ORDER BY rowid LIMIT ?)", (excess,)
+        )
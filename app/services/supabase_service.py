@@ -1,83 +1,138 @@
 import os
-from typing import Dict, Any, List, Optional
+import asyncio
+import itertools
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Set
+import httpx
+from pydantic import TypeAdapter
+from postgrest.exceptions import APIError
 from supabase import create_client, Client
+from tenacity import retry, stop_after_attempt, wait_random_exponential, retry_if_exception
 from app.models.models_commit import SubCommitAnalysis, Repository, Commit, SubCommitAnalysisSupabase
 from app.logger.logger import logger
 from app.config.settings import settings
 
+# Serialize whole lists in one pydantic-core call instead of one model_dump per row
+_commits_adapter = TypeAdapter(List[Commit])
+_analyses_adapter = TypeAdapter(List[SubCommitAnalysis])
+
+_client_lock = threading.Lock()
+
+# Attempts per Supabase request before a transient failure is surfaced to the caller
+SUPABASE_MAX_ATTEMPTS = 4
+
+def _is_transient_error(error: BaseException) -> bool:
+    # Only retry failures where the request cannot have been applied, so writes stay safe to repeat
+    if isinstance(error, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+        return True
+    return isinstance(error, APIError) and str(error.code) in ("502", "503")
+
+@retry(
+    stop=stop_after_attempt(SUPABASE_MAX_ATTEMPTS),
+    wait=wait_random_exponential(multiplier=0.1, max=10),
+    retry=retry_if_exception(_is_transient_error),
+    reraise=True
+)
+def _execute(query):
+    return query.execute()
+
+@lru_cache(maxsize=1)
+def _build_client() -> Client:
+    supabase_url = settings.SUPABASE_URL
+    supabase_key = settings.SUPABASE_KEY
+    
+    if not supabase_url or not supabase_key:
+        raise ValueError("Supabase URL or key not found in environment variables")
+    
+    logger.info("Creating Supabase client")
+    client = create_client(supabase_url, supabase_key)
+    logger.info("Supabase client created successfully")
+    return client
+
 def get_client() -> Optional[Client]:
     """
-    Get a Supabase client instance.
+    Get the shared Supabase client instance, creating it on first use.
     
     Returns:
         Supabase client or None if an error occurs
     """
     try:
-        supabase_url = settings.SUPABASE_URL
-        supabase_key = settings.SUPABASE_KEY
-        
-        if not supabase_url or not supabase_key:
-            logger.error("Supabase URL or key not found in environment variables")
-            return None
-        
-        logger.info("Creating Supabase client")
-        client = create_client(supabase_url, supabase_key)
-        logger.info("Supabase client created successfully")
-        return client
+        with _client_lock:
+            return _build_client()
     
     except Exception as e:
-        logger.error(f"Error creating Supabase client: {e}")
+        logger.error("Error creating Supabase client: %s", e)
         return None
 
-import asyncio
+def reset_client() -> None:
+    """
+    Drop the shared Supabase client so the next call to get_client creates a new one.
+    
+    Use this after authentication or connection errors.
+    """
+    with _client_lock:
+        _build_client.cache_clear()
+
+# Rows per bulk upsert; keeps request bodies well under PostgREST's payload limits
+COMMIT_UPSERT_BATCH_SIZE = 500
+# Maximum number of bulk upserts sent to Supabase at the same time
+COMMIT_UPSERT_CONCURRENCY = 4
+
+def _dedupe_commits(commits: List[Commit]) -> List[Commit]:
+    # Overlapping pages can repeat a commit; keep the last occurrence of each SHA
+    unique_commits = list({commit.sha: commit for commit in commits}.values())
+    if len(unique_commits) < len(commits):
+        logger.info("Dropped %s duplicate commits before storing", len(commits) - len(unique_commits))
+    return unique_commits
+
 async def store_commits(commits: List[Commit]) -> Dict[str, Any]:
     """
-    Store commits in Supabase in batches, handling potential duplicates efficiently.
+    Store commits in Supabase with bulk upserts, skipping commits that already exist.
+
+    Commits are sent in chunks of COMMIT_UPSERT_BATCH_SIZE rows, a few chunks at a time.
 
     Args:
         commits: List of Commit objects
 
     Returns:
-        Dictionary with result information, including counts of inserted and existing commits.
+        Dictionary with result information, including the SHAs of inserted and existing commits.
     """
     try:
-        logger.info(f"Storing {len(commits)} commits in Supabase")
+        commits = _dedupe_commits(commits)
+        logger.info("Storing %s commits in Supabase", len(commits))
         supabase = get_client()
         if not supabase:
             logger.error("Failed to initialize Supabase client")
             return {"error": "Failed to initialize Supabase client"}
 
-        inserted_commits = []
-        existing_commits = []
-        errors = []
-        batch_size = settings.BATCH_SIZE if hasattr(settings, 'BATCH_SIZE') else 50
-
-        for i in range(0, len(commits), batch_size):
-            batch = commits[i:i + batch_size]
-            commits_data = [commit.model_dump() for commit in batch]
-
-            # Prepare data for insertion
-            for commit_data in commits_data:
-                try:
-                    result = supabase.table('commits').insert(commit_data).execute()
-                    if result.data:
-                        inserted_commits.append(commit_data)
-                except Exception as e:
-                    if "duplicate key value violates unique constraint" in str(e):
-                        logger.warning(f"Commit with SHA {commit_data['sha']} already exists.")
-                        existing_commits.append(commit_data['sha'])
-                    else:
-                        logger.error(f"Error inserting commit {commit_data['sha']}: {str(e)}")
-                        errors.append(str(e))
+        commits_data = _commits_adapter.dump_python(commits, mode='json')
+        batches = [commits_data[i:i + COMMIT_UPSERT_BATCH_SIZE] for i in range(0, len(commits_data), COMMIT_UPSERT_BATCH_SIZE)]
+        semaphore = asyncio.Semaphore(COMMIT_UPSERT_CONCURRENCY)
 
-        inserted_count = len(inserted_commits)
-        existing_count = len(existing_commits)
-        
+        async def upsert_batch(batch: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            # ON CONFLICT DO NOTHING: only the newly inserted rows come back
+            query = supabase.table('commits').upsert(batch, on_conflict='sha', ignore_duplicates=True)
+            async with semaphore:
+                result = await asyncio.to_thread(_execute, query)
+            return result.data or []
+
+        batch_results = await asyncio.gather(*[upsert_batch(batch) for batch in batches], return_exceptions=True)
+
+        errors = [str(result) for result in batch_results if isinstance(result, Exception)]
         if errors:
             error_message = f"Errors occurred during commit insertion: {errors}"
             logger.error(error_message)
             return {"error": error_message}
 
+        inserted_shas = {row['sha'] for rows in batch_results for row in rows}
+        inserted_commits = [commit.sha for commit in commits if commit.sha in inserted_shas]
+        existing_commits = [commit.sha for commit in commits if commit.sha not in inserted_shas]
+
+        inserted_count = len(inserted_commits)
+        existing_count = len(existing_commits)
+
         result_message = f"Successfully processed {len(commits)} commits. Inserted {inserted_count} new commits. {existing_count} commits already existed."
         logger.info(result_message)
 
@@ -88,22 +143,27 @@ async def store_commits(commits: List[Commit]) -> Dict[str, Any]:
         }
 
     except Exception as e:
-        logger.error(f"Error storing commits: {e}")
+        logger.error("Error storing commits: %s", e)
         return {"error": str(e)}
 
 
+# Maximum analyses per store_commit_analyses call; a commit's analyses are never split across calls
+ANALYSIS_INSERT_BATCH_SIZE = 500
+
 def store_commit_analyses(analyses: List[SubCommitAnalysis]) -> Dict[str, Any]:
     """
-    Store commit analyses in Supabase.
+    Store commit analyses in Supabase, skipping commits that already have analyses.
     
-#     Args:
-#         analyses: List of SubCommitAnalysis objects
+    Analyses are sent in batches of about ANALYSIS_INSERT_BATCH_SIZE rows, one round-trip per batch.
+    
+    Args:
+        analyses: List of SubCommitAnalysis objects
         
     Returns:
         Dictionary with result information
     """
     try:
-        logger.info(f"Storing {len(analyses)} commit analyses in Supabase")
+        logger.info("Storing %s commit analyses in Supabase", len(analyses))
         # Initialize Supabase client
         supabase = get_client()
         if not supabase:
@@ -111,20 +171,27 @@ def store_commit_analyses(analyses: List[SubCommitAnalysis]) -> Dict[str, Any]:
             return {"error": "Failed to initialize Supabase client"}
 
         # Convert SubCommitAnalysis objects to dictionaries
-        analyses_data = [analysis.model_dump() for analysis in analyses]
-
-        # Fetch existing commit_sha values
-        existing_analyses_query = supabase.table('commit_analyses').select('commit_sha').in_('commit_sha', [analysis['commit_sha'] for analysis in analyses_data])
-        existing_analyses_result = existing_analyses_query.execute()
-        existing_commit_shas = {item['commit_sha'] for item in existing_analyses_result.data}
-
-        # Filter out analyses that already exist
-        new_analyses_data = [analysis for analysis in analyses_data if analysis['commit_sha'] not in existing_commit_shas]
-            
-        inserted_count = 0
-        if new_analyses_data:
-            result = supabase.table('commit_analyses').insert(new_analyses_data).execute()
-            inserted_count = len(result.data) if result.data else 0
+        analyses_data = _analyses_adapter.dump_python(analyses, mode='json')
+
+        # The function skips commits that already have analyses, so all analyses of a
+        # commit must go in the same batch or the later part would be dropped
+        analyses_by_commit: Dict[str, List[Dict[str, Any]]] = {}
+        for analysis in analyses_data:
+            analyses_by_commit.setdefault(analysis['commit_sha'], []).append(analysis)
+        batches: List[List[Dict[str, Any]]] = [[]]
+        for commit_analyses in analyses_by_commit.values():
+            if batches[-1] and len(batches[-1]) + len(commit_analyses) > ANALYSIS_INSERT_BATCH_SIZE:
+                batches.append([])
+            batches[-1].extend(commit_analyses)
+
+        # The existence check and the insert run together in the `store_commit_analyses` Postgres function
+        inserted_shas = set()
+        for batch in batches:
+            if batch:
+                result = _execute(supabase.rpc('store_commit_analyses', {'analyses': batch}))
+                inserted_shas.update(result.data.get("inserted_shas", []))
+        new_analyses_data = [analysis for analysis in analyses_data if analysis['commit_sha'] in inserted_shas]
+        inserted_count = len(new_analyses_data)
         
         result_message = f"Successfully processed {len(analyses)} analyses. Inserted {inserted_count} new analyses."
         logger.info(result_message)
@@ -134,7 +201,7 @@ def store_commit_analyses(analyses: List[SubCommitAnalysis]) -> Dict[str, Any]:
         }
     
     except Exception as e:
-        logger.error(f"Error storing commit analyses: {e}")
+        logger.error("Error storing commit analyses: %s", e)
         return {"error": str(e)}
 
 class AlreadyAnalyzedRepositoryError(Exception):
@@ -146,7 +213,7 @@ class AlreadyAnalyzedRepositoryError(Exception):
 def store_repo(repos: List[Repository]) -> Dict[str, Any]:
     """
     Store repository information in Supabase.
-    Handles potential duplicate key errors by checking for existing repositories.
+    Repositories that already exist are skipped by the database instead of raising a duplicate key error.
     
     Args:
         repos: List of Repository objects to store
@@ -159,28 +226,119 @@ def store_repo(repos: List[Repository]) -> Dict[str, Any]:
         if not supabase:
             return {"error": "Failed to connect to Supabase"}
         
-        logger.info(f"Storing {len(repos)} repositories in Supabase")
+        logger.info("Storing %s repositories in Supabase", len(repos))
         
         # Convert Repository objects to dictionaries
-        new_repos_data = [repo.model_dump() for repo in repos]
+        new_repos_data = [repo.model_dump(mode='json') for repo in repos]
         
-        # Attempt to insert repositories into Supabase
-        try:
-            result = supabase.table('repositories').insert(new_repos_data).execute()
-            # Success case - just return the data
-            return {"message": f"Successfully stored repositories", "data": result.data}
-        except Exception as e:
-            logger.error(f"Error inserting repositories: {str(e)}")
-            # Check if the error is a duplicate key violation
-            if "duplicate key value violates unique constraint" in str(e):
-                logger.warning("Duplicate key violation detected. Repository likely already analyzed.")
-                return {"error": "Repository already analyzed", "code": "duplicate_key"}
-            else:
-                # If it's another type of error, return the error message
-                return {"error": str(e)}
+        # ON CONFLICT DO NOTHING: repositories that already exist are skipped and not returned
+        result = _execute(supabase.table('repositories').upsert(new_repos_data, on_conflict='id', ignore_duplicates=True))
+        if len(result.data or []) < len(new_repos_data):
+            logger.warning("Repository already exists. Repository likely already analyzed.")
+            return {"error": "Repository already analyzed", "code": "duplicate_key"}
+        
+        return {"message": f"Successfully stored repositories", "data": result.data}
             
     except Exception as e:
-        logger.error(f"Error storing repositories: {str(e)}")
+        logger.error("Error storing repositories: %s", e)
+        return {"error": str(e)}
+
+def repo_exists(repo_id: str) -> bool:
+    """
+    Check whether a repository has already been stored in Supabase.
+    
+    Args:
+        repo_id: The GitHub ID of the repository
+        
+    Returns:
+        True if the repository exists, False otherwise
+    """
+    supabase = get_client()
+    if not supabase:
+        raise RuntimeError("Failed to connect to Supabase")
+    
+    result = _execute(supabase.table('repositories').select('id').eq('id', repo_id).limit(1))
+    return bool(result.data)
+
+def get_missing_commit_shas(repo_id: str, shas: List[str]) -> Set[str]:
+    """
+    Find which of the given commit SHAs are not yet stored for a repository.
+    
+    The difference is computed in Postgres by the `missing_shas` function, so
+    only the new SHAs are sent back instead of every stored SHA.
+    
+    Args:
+        repo_id: The GitHub ID of the repository
+        shas: Candidate commit SHAs
+        
+    Returns:
+        The subset of shas that are not stored yet
+    """
+    supabase = get_client()
+    if not supabase:
+        raise RuntimeError("Failed to connect to Supabase")
+    
+    result = _execute(supabase.rpc('missing_shas', {'repo_id': repo_id, 'candidates': shas}))
+    return set(result.data or [])
+
+async def store_repo_and_commits(repo: Repository, commits: List[Commit]) -> Dict[str, Any]:
+    """
+    Store a repository and its commits in Supabase.
+    
+    The repository and the first COMMIT_UPSERT_BATCH_SIZE commits are inserted together by the
+    `store_repo_and_commits` Postgres function, so a repository is never stored without commits
+    and a concurrent second analysis is rejected. The remaining commits are written in bounded
+    batches by store_commits, which keeps every request body small on large repositories; if one
+    of those batches fails the error is returned, and the next incremental update stores the
+    missing commits.
+    
+    Args:
+        repo: The Repository to store
+        commits: List of Commit objects belonging to the repository
+        
+    Returns:
+        Dictionary with result information, including the SHAs of inserted and existing commits.
+    """
+    try:
+        supabase = get_client()
+        if not supabase:
+            return {"error": "Failed to connect to Supabase"}
+        
+        commits = _dedupe_commits(commits)
+        logger.info("Storing repository %s with %s commits in Supabase", repo.name, len(commits))
+        
+        first_batch, remaining_commits = commits[:COMMIT_UPSERT_BATCH_SIZE], commits[COMMIT_UPSERT_BATCH_SIZE:]
+        result = await asyncio.to_thread(_execute, supabase.rpc('store_repo_and_commits', {
+            'repo': repo.model_dump(mode='json'),
+            'commits': _commits_adapter.dump_python(first_batch, mode='json')
+        }))
+        
+        if result.data.get("code") == "duplicate_key":
+            logger.warning("Duplicate key violation detected. Repository likely already analyzed.")
+            return {"error": "Repository already analyzed", "code": "duplicate_key"}
+        
+        inserted_shas = set(result.data.get("inserted_shas", []))
+        if remaining_commits:
+            remaining_result = await store_commits(remaining_commits)
+            if "error" in remaining_result:
+                logger.error("Stored repository %s but not all of its commits", repo.name)
+                return remaining_result
+            inserted_shas.update(remaining_result["inserted_commits"])
+        
+        inserted_commits = [commit.sha for commit in commits if commit.sha in inserted_shas]
+        existing_commits = [commit.sha for commit in commits if commit.sha not in inserted_shas]
+        
+        result_message = f"Successfully processed {len(commits)} commits. Inserted {len(inserted_commits)} new commits. {len(existing_commits)} commits already existed."
+        logger.info(result_message)
+        
+        return {
+            "message": result_message,
+            "inserted_commits": inserted_commits,
+            "existing_commits": existing_commits
+        }
+    
+    except Exception as e:
+        logger.error("Error storing repository and commits: %s", e)
         return {"error": str(e)}
 
 
@@ -198,25 +356,25 @@ def test_connection() -> Dict[str, Any]:
             logger.error("Supabase client not initialized")
             return {"error": "Supabase client not initialized"}
             
-        data = client.table('test').select("*").execute()
+        data = _execute(client.table('test').select("*"))
         logger.info("Supabase connection successful")
         return {"message": "Supabase connection successful", "data": data.data}
     
     except Exception as e:
-        logger.error(f"Error testing Supabase connection: {e}")
+        logger.error("Error testing Supabase connection: %s", e)
         return {"error": str(e)}
-from typing import List, Dict, Any
-from app.models.models_commit import SubCommitAnalysis
-from supabase import Client
+
+# Commits embedded per page when loading a repository's analyses
+ANALYSES_COMMITS_PAGE_SIZE = 500
 
 def get_all_commit_analyses(repository_url: str) -> Dict[str, List[SubCommitAnalysisSupabase]]:
     """
     Retrieve commit analyses from the 'commit_analyses' table in Supabase for a specific repository.
     
-    Process:
-    1. Get repository ID from the repository URL
-    2. Get all commit SHAs associated with that repository ID
-    3. Get all commit analyses that match those commit SHAs
+    The repository is looked up first, then its commits are paged ANALYSES_COMMITS_PAGE_SIZE
+    at a time in SHA order, each page embedding the commits' analyses through the
+    commit_analyses.commit_sha foreign key. Each page is deserialized before the next one
+    is requested.
 
     Args:
         repository_url: URL of the repository to get analyses for
@@ -225,50 +383,61 @@ def get_all_commit_analyses(repository_url: str) -> Dict[str, List[SubCommitAnal
         A dictionary containing either the fetched data (as a list of SubCommitAnalysis objects) or an error message.
     """
     try:
-        logger.info(f"Retrieving commit analyses for repository: {repository_url}")
+        logger.info("Retrieving commit analyses for repository: %s", repository_url)
         
         supabase: Client = get_client()
         if not supabase:
             logger.error("Failed to initialize Supabase client")
             return {"error": "Failed to initialize Supabase client"}
 
-        # Step 1: Get repository ID from the repository URL
-        repo_result = supabase.table('repositories').select("id").eq('url', repository_url).execute()
-        
+        repo_result = _execute(supabase.table('repositories').select("id").eq('url', repository_url).limit(1))
         if not repo_result.data:
-            logger.info(f"No repository found with URL: {repository_url}")
+            logger.info("No repository found with URL: %s", repository_url)
             return {"data": []}
-            
         repo_id = repo_result.data[0]['id']
-        logger.info(f"Found repository ID: {repo_id}")
         
-        # Step 2: Get all commit SHAs associated with that repository ID
-        commits_result = supabase.table('commits').select("sha").eq('repo_id', repo_id).execute()
+        # Page through the commits table itself, ordered by SHA so offsets are stable,
+        # embedding each commit's analyses so no single response holds the whole repository
+        analyses_data = []
+        commits_count = 0
+        for offset in itertools.count(0, ANALYSES_COMMITS_PAGE_SIZE):
+            commits_result = _execute(
+                supabase.table('commits')
+                .select("sha, commit_analyses(*)")
+                .eq('repo_id', repo_id)
+                .order('sha')
+                .range(offset, offset + ANALYSES_COMMITS_PAGE_SIZE - 1)
+            )
+            commits_data = commits_result.data
+            commits_count += len(commits_data)
+            analyses_data.extend(
+                SubCommitAnalysisSupabase(**item) for commit in commits_data for item in commit['commit_analyses']
+            )
+            if len(commits_data) < ANALYSES_COMMITS_PAGE_SIZE:
+                break
         
-        if not commits_result.data:
-            logger.info(f"No commits found for repository: {repository_url}")
-            return {"data": []}
-            
-        # Extract commit SHAs
-        commit_shas = [commit['sha'] for commit in commits_result.data]
-        logger.info(f"Found {len(commit_shas)} commits for repository")
+        logger.info("Found repository ID: %s", repo_id)
         
-        # Step 3: Get all commit analyses that match those commit SHAs
-        analyses_result = supabase.table('commit_analyses').select("*").in_('commit_sha', commit_shas).execute()
-
-        if analyses_result.data:
-            logger.info(f"Successfully retrieved {len(analyses_result.data)} commit analyses.")
-            
-            # Deserialize each item to a SubCommitAnalysis object
-            analyses: List[SubCommitAnalysisSupabase] = [SubCommitAnalysisSupabase(**item) for item in analyses_result.data]
-            
-            return {"data": analyses, "repo_id": repo_id}
+        if not commits_count:
+            logger.info("No commits found for repository: %s", repository_url)
+            return {"data": []}
+        logger.info("Found %s commits for repository", commits_count)
+
+        if analyses_data:
+            logger.info("Successfully retrieved %s commit analyses.", len(analyses_data))
+            # Similarity queries on this repository look analyses up by ID next, so prefetch them
+            if len(analyses_data) <= COMMIT_ANALYSIS_CACHE_SIZE:
+                _remember_commit_analyses({
+                    str(analysis.id): SubCommitAnalysis.model_construct(**{field: value for field, value in analysis if field != 'id'})
+                    for analysis in analyses_data
+                })
+            return {"data": analyses_data, "repo_id": repo_id}
         else:
-            logger.info(f"No commit analyses found for repository: {repository_url}")
+            logger.info("No commit analyses found for repository: %s", repository_url)
             return {"data": []}
 
     except Exception as e:
-        logger.error(f"Error retrieving commit analyses for repository {repository_url}: {e}")
+        logger.error("Error retrieving commit analyses for repository %s: %s", repository_url, e)
         return {"error": str(e)}
 
 def get_commit_analysis(subcommit_id: str) -> Dict[str, Any]:
@@ -282,25 +451,81 @@ def get_commit_analysis(subcommit_id: str) -> Dict[str, Any]:
         A dictionary containing either the fetched data (as a SubCommitAnalysis object) or an error message.
     """
     try:
-        logger.info(f"Retrieving commit analysis for SidHA: {subcommit_id}")
+        logger.info("Retrieving commit analysis for SidHA: %s", subcommit_id)
         supabase: Client = get_client()
         if not supabase:
             logger.error("Failed to initialize Supabase client")
             return {"error": "Failed to initialize Supabase client"}
 
-        result = supabase.table('commit_analyses').select("*").eq('id', subcommit_id).execute()
+        result = _execute(supabase.table('commit_analyses').select("*").eq('id', subcommit_id))
 
         if result.data and len(result.data) > 0:
-            logger.info(f"Successfully retrieved commit analysis for SidHA: {subcommit_id}")
+            logger.info("Successfully retrieved commit analysis for SidHA: %s", subcommit_id)
             
             # Deserialize the item to a SubCommitAnalysis object
             analysis = SubCommitAnalysis(**result.data[0])
             
             return {"data": analysis}
         else:
-            logger.info(f"No commit analysis found for SidHA: {subcommit_id}")
+            logger.info("No commit analysis found for SidHA: %s", subcommit_id)
             return {"data": None}
 
     except Exception as e:
-        logger.error(f"Error retrieving commit analysis for SidHA: {subcommit_id}: {e}")
-        return {"error": str(e)}
\ No newline at end of file
+        logger.error("Error retrieving commit analysis for SidHA: %s: %s", subcommit_id, e)
+        return {"error": str(e)}
+
+# Commit analyses never change once stored, so recently fetched ones are kept in memory
+COMMIT_ANALYSIS_CACHE_SIZE = 4096
+_commit_analysis_cache: "OrderedDict[str, SubCommitAnalysis]" = OrderedDict()
+_commit_analysis_cache_lock = threading.Lock()
+
+def _remember_commit_analyses(analyses: Dict[str, SubCommitAnalysis]) -> None:
+    with _commit_analysis_cache_lock:
+        for subcommit_id, analysis in analyses.items():
+            _commit_analysis_cache[subcommit_id] = analysis
+            _commit_analysis_cache.move_to_end(subcommit_id)
+        while len(_commit_analysis_cache) > COMMIT_ANALYSIS_CACHE_SIZE:
+            _commit_analysis_cache.popitem(last=False)
+
+def get_commit_analyses_bulk(subcommit_ids: List[str]) -> Dict[str, Any]:
+    """
+    Retrieve several commit analyses from the 'commit_analyses' table in Supabase with a single query.
+    Analyses that were fetched recently are served from memory.
+
+    Args:
+        subcommit_ids: The IDs of the commit analyses to retrieve
+
+    Returns:
+        A dictionary containing either the fetched data (SubCommitAnalysis objects, in the order of
+        subcommit_ids, skipping IDs that were not found) or an error message.
+    """
+    try:
+        if not subcommit_ids:
+            return {"data": []}
+
+        ids = [str(subcommit_id) for subcommit_id in subcommit_ids]
+        with _commit_analysis_cache_lock:
+            analyses_by_id = {subcommit_id: _commit_analysis_cache[subcommit_id] for subcommit_id in ids if subcommit_id in _commit_analysis_cache}
+        missing_ids = [subcommit_id for subcommit_id in ids if subcommit_id not in analyses_by_id]
+
+        if missing_ids:
+            logger.info("Retrieving %s commit analyses", len(missing_ids))
+            supabase: Client = get_client()
+            if not supabase:
+                logger.error("Failed to initialize Supabase client")
+                return {"error": "Failed to initialize Supabase client"}
+
+            result = _execute(supabase.table('commit_analyses').select("*").in_('id', missing_ids))
+
+            fetched = {str(item['id']): SubCommitAnalysis(**item) for item in result.data or []}
+            analyses_by_id.update(fetched)
+            _remember_commit_analyses(fetched)
+
+        analyses = [analyses_by_id[subcommit_id] for subcommit_id in ids if subcommit_id in analyses_by_id]
+        logger.info("Successfully retrieved %s commit analyses", len(analyses))
+
+        return {"data": analyses}
+
+    except Exception as e:
+        logger.error("Error retrieving commit analyses %s: %s", subcommit_ids, e)
+        return {"error": str(e)}
@@ -1,17 +1,23 @@
 from app.test.mock_commits import mock_commits
 from app.services.gemini import get_commit_analysis
 import asyncio
-import json
+import orjson
+
+# Maximum number of mock commits analyzed at the same time
+MAX_CONCURRENT_ANALYSES = 8
 
 async def main():
-    analyses = []
-    for commit in mock_commits:
-        analysis = await get_commit_analysis(commit)
-        analyses.append(analysis)
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_ANALYSES)
+
+    async def analyze(commit):
+        async with semaphore:
+            return await get_commit_analysis(commit)
+
+    analyses = await asyncio.gather(*[analyze(commit) for commit in mock_commits])
 
     for i, analysis in enumerate(analyses):
         print(f"--- Analysis {i+1}/{len(analyses)} ---")
-        print(json.dumps(analysis.model_dump(), indent=4))
+        print(orjson.dumps(analysis.model_dump(), option=orjson.OPT_INDENT_2).decode())
         print("\n")
 
 if __name__ == "__main__":
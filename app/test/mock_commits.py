@@ -1,13 +1,21 @@
 # Mock commits for testing
 from datetime import datetime
+from functools import lru_cache
+from typing import List
 
 from app.models.models_commit import Commit, File
 
 
-mock_commits = [
-    Commit(
-        created_at="2023-05-15T10:30:00Z",
-        repo_name="project-alpha",
+def __getattr__(name):
+    # Build the fixture on first access instead of at import time
+    if name == "mock_commits":
+        return _build_mock_commits()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+@lru_cache(maxsize=1)
+def _build_mock_commits() -> List[Commit]:
+    return [
+    Commit.model_construct(
         sha="a1b2c3d4e5f6g7h8i9j0k1l2m3n4o5p6q7r8s9t0",
         author="Alice Johnson",
         date="2023-05-15T10:30:00Z",
@@ -26,7 +34,7 @@ mock_commits = [
         """,
         author_url="https://github.com/alicejohnson",
         files=[
-            File(
+            File.model_construct(
                 filename="auth/login.py",
                 additions=150,
                 deletions=75,
@@ -34,21 +42,20 @@ mock_commits = [
                 status="modified",
                 raw_url="https://github.com/org/project-alpha/raw/a1b2c3d4e5/auth/login.py",
                 blob_url="https://github.com/org/project-alpha/blob/a1b2c3d4e5/auth/login.py",
-                patch="""@@ -42,7 +42,15 @@ def validate_user(username, password):
-        # Existing code...
-        +    # Implement rate limiting to prevent brute-force attacks
-        +    if rate_limit_exceeded(username):
-        +        return False, "Too many login attempts. Please try again later."
-        +
-        +    # Verify MFA if enabled
-        +    if user.mfa_enabled:
-        +        if not verify_totp(username, totp_code):
-        +            return False, "Invalid MFA code."
-        +
-        # More new code...
-        """
+                patch="""@@ -42,2 +42,11 @@ def validate_user(username, password):
+ # Existing code...
++    # Implement rate limiting to prevent brute-force attacks
++    if rate_limit_exceeded(username):
++        return False, "Too many login attempts. Please try again later."
++
++    # Verify MFA if enabled
++    if user.mfa_enabled:
++        if not verify_totp(username, totp_code):
++            return False, "Invalid MFA code."
++
+ # More new code..."""
             ),
-            File(
+            File.model_construct(
                 filename="auth/mfa.py",
                 additions=80,
                 deletions=0,
@@ -56,25 +63,24 @@ mock_commits = [
                 status="added",
                 raw_url="https://github.com/org/project-alpha/raw/a1b2c3d4e5/auth/mfa.py",
                 blob_url="https://github.com/org/project-alpha/blob/a1b2c3d4e5/auth/mfa.py",
-                patch="""@@ -0,0 +1,80 @@
-        +# MFA implementation using TOTP
-        +import pyotp
-        +
-        +def generate_totp_secret():
-        +    # Generates a new TOTP secret key
-        +    return pyotp.random_base32()
-        +
-        +def get_totp_uri(secret, username):
-        +    # Generates a TOTP URI for use with authenticator apps
-        +    return pyotp.TOTP(secret).provisioning_uri(name=username, issuer_name="Project Alpha")
-        +
-        +def verify_totp(secret, code):
-        +    # Verifies a TOTP code against the secret key
-        +    totp = pyotp.TOTP(secret)
-        +    return totp.verify(code)
-        """
+                patch="""@@ -0,0 +1,15 @@
++# MFA implementation using TOTP
++import pyotp
++
++def generate_totp_secret():
++    # Generates a new TOTP secret key
++    return pyotp.random_base32()
++
++def get_totp_uri(secret, username):
++    # Generates a TOTP URI for use with authenticator apps
++    return pyotp.TOTP(secret).provisioning_uri(name=username, issuer_name="Project Alpha")
++
++def verify_totp(secret, code):
++    # Verifies a TOTP code against the secret key
++    totp = pyotp.TOTP(secret)
++    return totp.verify(code)"""
             ),
-            File(
+            File.model_construct(
                 filename="requirements.txt",
                 additions=2,
                 deletions=0,
@@ -83,15 +89,12 @@ mock_commits = [
                 raw_url="https://github.com/org/project-alpha/raw/a1b2c3d4e5/requirements.txt",
                 blob_url="https://github.com/org/project-alpha/blob/a1b2c3d4e5/requirements.txt",
                 patch="""@@ -10,0 +11,2 @@
-        +pyotp
-        +argon2-cffi
-        """
++pyotp
++argon2-cffi"""
             )
         ]
     ),
-    Commit(
-        created_at="2023-06-02T14:45:00Z",
-        repo_name="project-beta",
+    Commit.model_construct(
         sha="b2c3d4e5f6g7h8i9j0k1l2m3n4o5p6q7r8s9t0u1",
         author="Bob Smith",
         date="2023-06-02T14:45:00Z",
@@ -110,7 +113,7 @@ mock_commits = [
         """,
         author_url="https://github.com/bobsmith",
         files=[
-            File(
+            File.model_construct(
                 filename="styles/theme.css",
                 additions=780,
                 deletions=120,
@@ -118,22 +121,21 @@ mock_commits = [
                 status="modified",
                 raw_url="https://github.com/org/project-beta/raw/b2c3d4e5f6/styles/theme.css",
                 blob_url="https://github.com/org/project-beta/blob/b2c3d4e5f6/styles/theme.css",
-                patch="""@@ -105,12 +105,78 @@ .light-theme {
-        +    --primary-color: #007bff;
-        +    --secondary-color: #6c757d;
-        +    --background-color: #f8f9fa;
-        +    --text-color: #212529;
-        +}
-        +
-        +.dark-theme {
-        +    --primary-color: #66b3ff;
-        +    --secondary-color: #adb5bd;
-        +    --background-color: #343a40;
-        +    --text-color: #f8f9fa;
-        +}
-        """
+                patch="""@@ -105,0 +105,12 @@ .light-theme {
++    --primary-color: #007bff;
++    --secondary-color: #6c757d;
++    --background-color: #f8f9fa;
++    --text-color: #212529;
++}
++
++.dark-theme {
++    --primary-color: #66b3ff;
++    --secondary-color: #adb5bd;
++    --background-color: #343a40;
++    --text-color: #f8f9fa;
++}"""
             ),
-            File(
+            File.model_construct(
                 filename="components/ThemeToggle.js",
                 additions=450,
                 deletions=0,
@@ -141,23 +143,22 @@ mock_commits = [
                 status="added",
                 raw_url="https://github.com/org/project-beta/raw/b2c3d4e5f6/components/ThemeToggle.js",
                 blob_url="https://github.com/org/project-beta/blob/b2c3d4e5f6/components/ThemeToggle.js",
-                patch="""@@ -0,0 +1,45 @@ import React from 'react';
-        +import { ThemeContext } from './ThemeContext';
-        +
-        +const ThemeToggle = () => {
-        +    const { theme, toggleTheme } = React.useContext(ThemeContext);
-        +
-        +    return (
-        +        <button onClick={toggleTheme}>
-        +            {theme === 'light' ? 'Enable Dark Mode' : 'Enable Light Mode'}
-        +        </button>
-        +    );
-        +};
-        +
-        +export default ThemeToggle;
-        """
+                patch="""@@ -0,0 +1,13 @@ import React from 'react';
++import { ThemeContext } from './ThemeContext';
++
++const ThemeToggle = () => {
++    const { theme, toggleTheme } = React.useContext(ThemeContext);
++
++    return (
++        <button onClick={toggleTheme}>
++            {theme === 'light' ? 'Enable Dark Mode' : 'Enable Light Mode'}
++        </button>
++    );
++};
++
++export default ThemeToggle;"""
             ),
-            File(
+            File.model_construct(
                 filename="components/ThemeContext.js",
                 additions=100,
                 deletions=0,
@@ -165,31 +166,28 @@ mock_commits = [
                 status="added",
                 raw_url="https://github.com/org/project-beta/raw/b2c3d4e5f6/components/ThemeContext.js",
                 blob_url="https://github.com/org/project-beta/blob/b2c3d4e5f6/components/ThemeContext.js",
-                patch="""@@ -0,0 +1,100 @@
-        +import React, { useState, createContext } from 'react';
-        +
-        +export const ThemeContext = createContext();
-        +
-        +export const ThemeProvider = ({ children }) => {
-        +    const [theme, setTheme] = useState('light');
-        +
-        +    const toggleTheme = () => {
-        +        setTheme(prevTheme => (prevTheme === 'light' ? 'dark' : 'light'));
-        +    };
-        +
-        +    return (
-        +        <ThemeContext.Provider value={{ theme, toggleTheme }}>
-        +            {children}
-        +        </ThemeContext.Provider>
-        +    );
-        +};
-        """
+                patch="""@@ -0,0 +1,17 @@
++import React, { useState, createContext } from 'react';
++
++export const ThemeContext = createContext();
++
++export const ThemeProvider = ({ children }) => {
++    const [theme, setTheme] = useState('light');
++
++    const toggleTheme = () => {
++        setTheme(prevTheme => (prevTheme === 'light' ? 'dark' : 'light'));
++    };
++
++    return (
++        <ThemeContext.Provider value={{ theme, toggleTheme }}>
++            {children}
++        </ThemeContext.Provider>
++    );
++};"""
             )
         ]
     ),
-    Commit(
-        created_at="2023-07-10T09:15:00Z",
-        repo_name="project-gamma",
+    Commit.model_construct(
         sha="c3d4e5f6g7h8i9j0k1l2m3n4o5p6q7r8s9t0u1v2",
         author="Carol Davis",
         date="2023-07-10T09:15:00Z",
@@ -207,7 +205,7 @@ mock_commits = [
         """,
         author_url="https://github.com/caroldavis",
         files=[
-            File(
+            File.model_construct(
                 filename="database/queries.py",
                 additions=320,
                 deletions=280,
@@ -215,23 +213,22 @@ mock_commits = [
                 status="modified",
                 raw_url="https://github.com/org/project-gamma/raw/c3d4e5f6g7/database/queries.py",
                 blob_url="https://github.com/org/project-gamma/blob/c3d4e5f6g7/database/queries.py",
-                patch="""@@ -78,28 +78,32 @@ def get_user_data(user_id):
-        +    # Use Redis cache to retrieve user data
-        +    user_data = redis_client.get(f"user:{user_id}")
-        +    if user_data:
-        +        return json.loads(user_data)
-        +
-        +    # Execute the database query if data is not in cache
-        +    cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
-        +    user_data = cursor.fetchone()
-        +
-        +    # Store the data in Redis cache
-        +    redis_client.set(f"user:{user_id}", json.dumps(user_data), ex=3600)
-        +
-        +    return user_data
-        """
+                patch="""@@ -78,0 +78,13 @@ def get_user_data(user_id):
++    # Use Redis cache to retrieve user data
++    user_data = redis_client.get(f"user:{user_id}")
++    if user_data:
++        return json.loads(user_data)
++
++    # Execute the database query if data is not in cache
++    cursor.execute("SELECT * FROM users WHERE id = %s", (user_id,))
++    user_data = cursor.fetchone()
++
++    # Store the data in Redis cache
++    redis_client.set(f"user:{user_id}", json.dumps(user_data), ex=3600)
++
++    return user_data"""
             ),
-            File(
+            File.model_construct(
                 filename="database/schema.sql",
                 additions=50,
                 deletions=0,
@@ -239,12 +236,11 @@ mock_commits = [
                 status="modified",
                 raw_url="https://github.com/org/project-gamma/raw/c3d4e5f6g7/database/schema.sql",
                 blob_url="https://github.com/org/project-gamma/blob/c3d4e5f6g7/database/schema.sql",
-                patch="""@@ -120,0 +121,5 @@ CREATE TABLE users (
-        +CREATE INDEX idx_users_email ON users (email);
-        +CREATE INDEX idx_users_username ON users (username);
-        """
+                patch="""@@ -120,0 +121,2 @@ CREATE TABLE users (
++CREATE INDEX idx_users_email ON users (email);
++CREATE INDEX idx_users_username ON users (username);"""
             ),
-            File(
+            File.model_construct(
                 filename="cache/redis_client.py",
                 additions=100,
                 deletions=0,
@@ -252,34 +248,31 @@ mock_commits = [
                 status="added",
                 raw_url="https://github.com/org/project-gamma/raw/c3d4e5f6g7/cache/redis_client.py",
                 blob_url="https://github.com/org/project-gamma/blob/c3d4e5f6g7/cache/redis_client.py",
-                patch="""@@ -0,0 +1,100 @@
-        +import redis
-        +
-        +class RedisClient:
-        +    def __init__(self, host='localhost', port=6379, db=0):
-        +        self.redis = redis.Redis(host=host, port=port, db=db)
-        +
-        +    def get(self, key):
-        +        try:
-        +            return self.redis.get(key)
-        +        except redis.exceptions.ConnectionError as e:
-        +            print(f"Error connecting to Redis: {e}")
-        +            return None
-        +
-        +    def set(self, key, value, ex=None):
-        +        try:
-        +            self.redis.set(key, value, ex=ex)
-        +        except redis.exceptions.ConnectionError as e:
-        +            print(f"Error connecting to Redis: {e}")
-        +
-        +redis_client = RedisClient()
-        """
+                patch="""@@ -0,0 +1,20 @@
++import redis
++
++class RedisClient:
++    def __init__(self, host='localhost', port=6379, db=0):
++        self.redis = redis.Redis(host=host, port=port, db=db)
++
++    def get(self, key):
++        try:
++            return self.redis.get(key)
++        except redis.exceptions.ConnectionError as e:
++            print(f"Error connecting to Redis: {e}")
++            return None
++
++    def set(self, key, value, ex=None):
++        try:
++            self.redis.set(key, value, ex=ex)
++        except redis.exceptions.ConnectionError as e:
++            print(f"Error connecting to Redis: {e}")
++
++redis_client = RedisClient()"""
             )
         ]
     ),
-    Commit(
-        created_at="2023-08-22T16:00:00Z",
-        repo_name="project-delta",
+    Commit.model_construct(
         sha="d4e5f6g7h8i9j0k1l2m3n4o5p6q7r8s9t0u1v2w3",
         author="Dave Wilson",
         date="2023-08-22T16:00:00Z",
@@ -297,7 +290,7 @@ mock_commits = [
         """,
         author_url="https://github.com/davewilson",
         files=[
-            File(
+            File.model_construct(
                 filename="api/endpoints.py",
                 additions=80,
                 deletions=30,
@@ -305,15 +298,14 @@ mock_commits = [
                 status="modified",
                 raw_url="https://github.com/org/project-delta/raw/d4e5f6g7h8/api/endpoints.py",
                 blob_url="https://github.com/org/project-delta/blob/d4e5f6g7h8/api/endpoints.py",
-                patch="""@@ -203,7 +203,12 @@ def get_user_data():
-        +    # Validate input using JSON schema
-        +    validate_input(request.json, user_data_schema)
-        +
-        +    # Authenticate user using JWT
-        +    user = authenticate_user(request.headers.get('Authorization'))
-        """
+                patch="""@@ -203,0 +203,5 @@ def get_user_data():
++    # Validate input using JSON schema
++    validate_input(request.json, user_data_schema)
++
++    # Authenticate user using JWT
++    user = authenticate_user(request.headers.get('Authorization'))"""
             ),
-            File(
+            File.model_construct(
                 filename="middleware/auth.py",
                 additions=170,
                 deletions=50,
@@ -321,18 +313,17 @@ mock_commits = [
                 status="modified",
                 raw_url="https://github.com/org/project-delta/raw/d4e5f6g7h8/middleware/auth.py",
                 blob_url="https://github.com/org/project-delta/blob/d4e5f6g7h8/middleware/auth.py",
-                patch="""@@ -45,9 +45,21 @@ def validate_token(token):
-        +    # Verify JWT token
-        +    try:
-        +        payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
-        +        return payload['user_id']
-        +    except jwt.ExpiredSignatureError:
-        +        return None
-        +    except jwt.InvalidTokenError:
-        +        return None
-        """
+                patch="""@@ -45,0 +45,8 @@ def validate_token(token):
++    # Verify JWT token
++    try:
++        payload = jwt.decode(token, SECRET_KEY, algorithms=['HS256'])
++        return payload['user_id']
++    except jwt.ExpiredSignatureError:
++        return None
++    except jwt.InvalidTokenError:
++        return None"""
             ),
-            File(
+            File.model_construct(
                 filename="config/security.py",
                 additions=50,
                 deletions=0,
@@ -340,20 +331,17 @@ mock_commits = [
                 status="added",
                 raw_url="https://github.com/org/project-delta/raw/d4e5f6g7h8/config/security.py",
                 blob_url="https://github.com/org/project-delta/blob/d4e5f6g7h8/config/security.py",
-                patch="""@@ -0,0 +1,50 @@
-        +# Security configuration settings
-        +import os
-        +
-        +SECRET_KEY = os.environ.get('SECRET_KEY', 'default_secret_key')
-        +ALGORITHM = 'HS256'
-        +ACCESS_TOKEN_EXPIRE_MINUTES = 30
-        """
+                patch="""@@ -0,0 +1,6 @@
++# Security configuration settings
++import os
++
++SECRET_KEY = os.environ.get('SECRET_KEY', 'default_secret_key')
++ALGORITHM = 'HS256'
++ACCESS_TOKEN_EXPIRE_MINUTES = 30"""
             )
         ]
     ),
-    Commit(
-        created_at="2023-09-05T11:20:00Z",
-        repo_name="project-epsilon",
+    Commit.model_construct(
         sha="e5f6g7h8i9j0k1l2m3n4o5p6q7r8s9t0u1v2w3x4",
         author="Eve Brown",
         date="2023-09-05T11:20:00Z",
@@ -370,7 +358,7 @@ mock_commits = [
         """,
         author_url="https://github.com/evebrown",
         files=[
-            File(
+            File.model_construct(
                 filename="tests/test_payment.py",
                 additions=1200,
                 deletions=0,
@@ -378,24 +366,23 @@ mock_commits = [
                 status="added",
                 raw_url="https://github.com/org/project-epsilon/raw/e5f6g7h8i9/tests/test_payment.py",
                 blob_url="https://github.com/org/project-epsilon/blob/e5f6g7h8i9/tests/test_payment.py",
-                patch="""@@ -0,0 +1,120 @@ import unittest
-        +from payment.processor import process_payment
-        +
-        +class TestPaymentProcessing(unittest.TestCase):
-        +    def test_successful_payment(self):
-        +        # Test a successful payment
-        +        result = process_payment(100, 'valid_card_details')
-        +        self.assertTrue(result['success'])
-        +        self.assertEqual(result['amount'], 100)
-        +
-        +    def test_invalid_card_number(self):
-        +        # Test with an invalid card number
-        +        result = process_payment(100, 'invalid_card_number')
-        +        self.assertFalse(result['success'])
-        +        self.assertEqual(result['error'], 'Invalid card number')
-        """
+                patch="""@@ -0,0 +1,14 @@ import unittest
++from payment.processor import process_payment
++
++class TestPaymentProcessing(unittest.TestCase):
++    def test_successful_payment(self):
++        # Test a successful payment
++        result = process_payment(100, 'valid_card_details')
++        self.assertTrue(result['success'])
++        self.assertEqual(result['amount'], 100)
++
++    def test_invalid_card_number(self):
++        # Test with an invalid card number
++        result = process_payment(100, 'invalid_card_number')
++        self.assertFalse(result['success'])
++        self.assertEqual(result['error'], 'Invalid card number')"""
             ),
-            File(
+            File.model_construct(
                 filename="payment/processor.py",
                 additions=50,
                 deletions=20,
@@ -403,13 +390,12 @@ mock_commits = [
                 status="modified",
                 raw_url="https://github.com/org/project-epsilon/raw/e5f6g7h8i9/payment/processor.py",
                 blob_url="https://github.com/org/project-epsilon/blob/e5f6g7h8i9/payment/processor.py",
-                patch="""@@ -87,7 +87,10 @@ def process_payment(amount, card_details):
-        +    # Validate card details
-        +    if not validate_card(card_details):
-        +        return {'success': False, 'error': 'Invalid card details'}
-        """
+                patch="""@@ -87,0 +87,3 @@ def process_payment(amount, card_details):
++    # Validate card details
++    if not validate_card(card_details):
++        return {'success': False, 'error': 'Invalid card details'}"""
             ),
-            File(
+            File.model_construct(
                 filename=".github/workflows/ci.yml",
                 additions=60,
                 deletions=0,
@@ -417,34 +403,33 @@ mock_commits = [
                 status="added",
                 raw_url="https://github.com/org/project-epsilon/raw/e5f6g7h8i9/.github/workflows/ci.yml",
                 blob_url="https://github.com/org/project-epsilon/blob/e5f6g7h8i9/.github/workflows/ci.yml",
-                patch="""@@ -0,0 +1,60 @@
-        +name: CI
-        +
-        +on:
-        +  push:
-        +    branches: [ "main" ]
-        +  pull_request:
-        +    branches: [ "main" ]
-        +
-        +jobs:
-        +  build:
-        +    runs-on: ubuntu-latest
-        +
-        +    steps:
-        +      - uses: actions/checkout@v3
-        +      - name: Set up Python 3.10
-        +        uses: actions/setup-python@v3
-        +        with:
-        +          python-version: "3.10"
-        +      - name: Install dependencies
-        +        run: |
-        +          python -m pip install --upgrade pip
-        +          pip install -r requirements.txt
-        +      - name: Run tests
-        +        run: |
-        +          python -m unittest discover -s tests
-        """
+                patch="""@@ -0,0 +1,25 @@
++name: CI
++
++on:
++  push:
++    branches: [ "main" ]
++  pull_request:
++    branches: [ "main" ]
++
++jobs:
++  build:
++    runs-on: ubuntu-latest
++
++    steps:
++      - uses: actions/checkout@v3
++      - name: Set up Python 3.10
++        uses: actions/setup-python@v3
++        with:
++          python-version: "3.10"
++      - name: Install dependencies
++        run: |
++          python -m pip install --upgrade pip
++          pip install -r requirements.txt
++      - name: Run tests
++        run: |
++          python -m unittest discover -s tests"""
             )
         ]
     )
-]
\ No newline at end of file
+]
@@ -1,17 +1,23 @@
+import sys
+import time
 import asyncio
+from typing import List
 from app.services.embeddings import get_text_embedding
 
-async def main():
-    test_text = "This is a test sentence for embedding."
+async def main(texts: List[str]):
     try:
-        embedding = await get_text_embedding(test_text)
-        print("Embedding generated successfully:")
-        print(embedding)
-        print(f"Embedding length: {len(embedding)}")
-        assert len(embedding) > 0, "Embedding should not be empty"
+        # All texts go through a single batched embedding call
+        start = time.perf_counter()
+        embeddings = await get_text_embedding(texts)
+        elapsed = time.perf_counter() - start
+        print(f"Generated {len(embeddings)} embeddings in {elapsed:.3f}s:")
+        for text, embedding in zip(texts, embeddings):
+            print(f"{text!r}: length {len(embedding)}")
+            print(embedding)
+        assert len(embeddings) == len(texts), "Expected one embedding per text"
+        assert all(len(embedding) > 0 for embedding in embeddings), "Embeddings should not be empty"
     except Exception as e:
         print(f"Error during embedding generation: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(main())
-
+    asyncio.run(main(sys.argv[1:] or ["This is a test sentence for embedding."]))
@@ -1,14 +1,20 @@
-from fastapi import FastAPI, Depends, HTTPException, Security, Request, Response
+import hmac
+import orjson
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Depends, HTTPException, Security, Response
 from fastapi.security import APIKeyHeader, APIKeyQuery
 from fastapi.middleware.cors import CORSMiddleware
-from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi.responses import ORJSONResponse
 from app.controllers.github_controller import router as github_router
 from app.controllers.analysis_controller import router as analysis_router
 from app.controllers.auth_controller import auth_router
+from app.services.commits import github_client
 import uvicorn
 from app.config.settings import settings
+from app.logger.logger import logger
 
 API_KEY = settings.API_KEY
+API_KEY_BYTES = API_KEY.encode()
 API_KEY_NAME = "Authorization"
 
 api_key_query = APIKeyQuery(name=API_KEY_NAME, auto_error=False)
@@ -18,38 +24,67 @@ async def get_api_key(
     api_key_query: str = Security(api_key_query),
     api_key_header: str = Security(api_key_header),
 ):
-    if api_key_query == API_KEY:
-        return api_key_query
-    elif api_key_header == API_KEY:
-        return api_key_header
-    else:
-        raise HTTPException(
-            status_code=403,
-            detail="Could not validate credentials"
-        )
-
-# Custom middleware to ensure CORS headers are added to all responses
-class CORSHeaderMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
-        response = await call_next(request)
-        response.headers["Access-Control-Allow-Origin"] = "*"
-        response.headers["Access-Control-Allow-Credentials"] = "true"
-        response.headers["Access-Control-Allow-Methods"] = "GET, POST, PUT, DELETE, OPTIONS, HEAD, PATCH"
-        response.headers["Access-Control-Allow-Headers"] = "*"
-        return response
+    # Header first since that is how API clients send the key; the query parameter is a fallback.
+    # Constant-time comparison so response timing does not reveal how much of the key matched
+    for api_key in (api_key_header, api_key_query):
+        if api_key and hmac.compare_digest(api_key.encode(), API_KEY_BYTES):
+            return api_key
+    raise HTTPException(
+        status_code=403,
+        detail="Could not validate credentials"
+    )
+
+# Unprefixed paths kept working for clients that call /auth/... and /github/... directly
+LEGACY_PREFIXES = ("/auth/", "/github/")
+
+class LegacyPrefixMiddleware:
+    """Rewrite unprefixed /auth and /github paths to their /api/v1 routes before routing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].startswith(LEGACY_PREFIXES):
+            scope = dict(scope)
+            scope["path"] = "/api/v1" + scope["path"]
+            if "raw_path" in scope:
+                scope["raw_path"] = b"/api/v1" + scope["raw_path"]
+        await self.app(scope, receive, send)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Close shared HTTP clients on shutdown so pooled connections are released."""
+    yield
+    await github_client.aclose()
+
+# Interactive docs and the OpenAPI schema are only served in development
+DOCS_ENABLED = settings.ENVIRONMENT == "development"
 
 app = FastAPI(
     title="GitHub API",
     description="API for retrieving GitHub repository information",
     version="0.1.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
+    docs_url="/docs" if DOCS_ENABLED else None,
+    redoc_url="/redoc" if DOCS_ENABLED else None,
+    openapi_url="/openapi.json" if DOCS_ENABLED else None,
     # Only apply API key validation to non-auth endpoints
     # dependencies=[Depends(get_api_key)],
 )
 
+# With credentials allowed, a wildcard outside development would let any site make authenticated
+# requests, so cross-origin access stays off until ALLOWED_ORIGINS lists the frontend origins
+if settings.ENVIRONMENT != "development" and "*" in settings.ALLOWED_ORIGINS:
+    logger.warning("ALLOWED_ORIGINS is not set, cross-origin requests are disabled")
+    ALLOWED_ORIGINS = []
+else:
+    ALLOWED_ORIGINS = settings.ALLOWED_ORIGINS
+
 # Configure CORS - MUST be added before any routers
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Allows all origins
+    allow_origins=ALLOWED_ORIGINS,
     allow_credentials=True,
     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "HEAD", "PATCH"],
     allow_headers=["*"],  # Allows all headers
@@ -57,58 +92,37 @@ app.add_middleware(
     max_age=86400,  # Cache preflight requests for 24 hours
 )
 
-# Add custom CORS header middleware as a backup
-app.add_middleware(CORSHeaderMiddleware)
-
-# Example of how to restrict to specific domains in production:
-# app.add_middleware(
-#     CORSMiddleware,
-#     allow_origins=[
-#         "http://localhost:3000",  # React development server
-#         "https://your-production-frontend.com",
-#         "https://your-staging-frontend.com",
-#     ],
-#     allow_credentials=True,
-#     allow_methods=["GET", "POST", "PUT", "DELETE", "OPTIONS", "HEAD", "PATCH"],
-#     allow_headers=["Authorization", "Content-Type", "Accept", "Origin", "X-Requested-With"],
-#     expose_headers=["Content-Length", "Content-Type"],
-#     max_age=86400,  # Cache preflight requests for 24 hours
-# )
-
-# Include routers
-# Include auth router at both /api/v1/auth and /auth to support both paths
-app.include_router(auth_router, prefix="/api/v1")  # No API key required for auth endpoints
-app.include_router(auth_router, prefix="")  # Also include at root path for direct access
-
-# Include github router at both /api/v1/github and /github to support both paths
-# Remove API key dependency for GitHub endpoints to simplify authentication
-app.include_router(github_router, prefix="/api/v1")
-app.include_router(github_router, prefix="")  # Also include at root path for direct access
-
-# Include analysis router only at /api/v1/analysis
-app.include_router(analysis_router, prefix="/api/v1", dependencies=[Depends(get_api_key)])
+# Serve /auth and /github as aliases of their /api/v1 routes without registering every route twice
+app.add_middleware(LegacyPrefixMiddleware)
+
+# Routers and the dependencies they require; auth and GitHub endpoints need no API key
+ROUTERS = (
+    (auth_router, []),
+    (github_router, []),
+    (analysis_router, [Depends(get_api_key)]),
+)
+
+for router, dependencies in ROUTERS:
+    app.include_router(router, prefix="/api/v1", dependencies=dependencies)
+
+# The root payload never changes, so it is serialized once at import
+ROOT_RESPONSE_BODY = orjson.dumps({
+    "message": "GitHub API is running",
+    "docs": app.docs_url,
+    "endpoints": {
+        "github_commits": "/api/v1/github/commits?repo_url=owner/repo",
+        "analysis_commits": "/api/v1/analysis/commits?repo_url=owner/repo",
+        "auth_exchange_code": "/auth/exchange_code or /api/v1/auth/exchange_code",
+        "github_user": "/github/user or /api/v1/github/user"
+    }
+})
 
 @app.get("/api/v1/", tags=["root"])
 async def root():
     """Root endpoint that returns API information."""
-    return {
-        "message": "GitHub API is running",
-        "docs": "/docs",
-        "endpoints": {
-            "github_commits": "/api/v1/github/commits?repo_url=owner/repo",
-            "analysis_commits": "/api/v1/analysis/commits?repo_url=owner/repo",
-            "auth_exchange_code": "/auth/exchange_code or /api/v1/auth/exchange_code",
-            "github_user": "/github/user or /api/v1/github/user"
-        }
-    }
-
-# Add OPTIONS handler for the root path
-@app.options("/{full_path:path}")
-async def options_handler(full_path: str):
-    """
-    Global OPTIONS handler to support CORS preflight requests.
-    """
-    return {}
+    return Response(content=ROOT_RESPONSE_BODY, media_type="application/json")
 
 if __name__ == "__main__":
-    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=True)
\ No newline at end of file
+    # Reload spawns a file watcher and access logs cost a write per request; both are for local development
+    is_development = settings.ENVIRONMENT == "development"
+    uvicorn.run("main:app", host="0.0.0.0", port=8000, reload=is_development, access_log=is_development)
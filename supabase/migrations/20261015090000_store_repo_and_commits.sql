@@ -0,0 +1,34 @@
+-- Store a repository and its commits in a single round-trip and transaction.
+--
+-- Returns {"code": "duplicate_key"} when the repository already exists, otherwise
+-- {"inserted_shas": [...]} with the SHAs of the commits that were actually inserted.
+create or replace function store_repo_and_commits(repo jsonb, commits jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    inserted_shas text[];
+begin
+    insert into repositories (id, name, url)
+    values (repo->>'id', repo->>'name', repo->>'url')
+    on conflict do nothing;
+
+    if not found then
+        return jsonb_build_object('code', 'duplicate_key');
+    end if;
+
+    with inserted as (
+        insert into commits (sha, author, date, message, url, author_email, description, author_url, repo_id, files)
+        select c.sha, c.author, c.date, c.message, c.url, c.author_email, c.description, c.author_url, c.repo_id, c.files
+        from jsonb_to_recordset(commits) as c(
+            sha text, author text, date text, message text, url text, author_email text,
+            description text, author_url text, repo_id text, files jsonb
+        )
+        on conflict (sha) do nothing
+        returning sha
+    )
+    select coalesce(array_agg(sha), '{}') into inserted_shas from inserted;
+
+    return jsonb_build_object('inserted_shas', to_jsonb(inserted_shas));
+end;
+$$;
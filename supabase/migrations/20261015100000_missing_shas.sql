@@ -0,0 +1,14 @@
+-- Return the candidate SHAs that are not yet stored for a repository.
+create or replace function missing_shas(repo_id text, candidates text[])
+returns text[]
+language sql
+stable
+as $$
+    select coalesce(array_agg(candidate), '{}')
+    from (
+        select unnest(candidates) as candidate
+        except
+        select sha from commits
+        where commits.repo_id = missing_shas.repo_id and sha = any(candidates)
+    ) as missing;
+$$;
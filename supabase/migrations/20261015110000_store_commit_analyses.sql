@@ -0,0 +1,37 @@
+-- Store commit analyses in a single round-trip, skipping commits that already have analyses.
+--
+-- A commit has several analyses, so commit_sha cannot carry a unique index for
+-- ON CONFLICT. Instead the existence check and the insert run in one statement,
+-- under a per-commit advisory lock so concurrent writers cannot both insert.
+--
+-- Returns {"inserted_shas": [...]} with the SHAs of the commits whose analyses were inserted.
+create or replace function store_commit_analyses(analyses jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    inserted_shas text[];
+begin
+    perform pg_advisory_xact_lock(hashtext(sha))
+    from (
+        select distinct a->>'commit_sha' as sha
+        from jsonb_array_elements(analyses) as a
+        order by 1
+    ) as shas;
+
+    with inserted as (
+        insert into commit_analyses (title, idea, description, type, commit_sha, files)
+        select a.title, a.idea, a.description, a.type, a.commit_sha, a.files
+        from jsonb_to_recordset(analyses) as a(
+            title text, idea text, description text, type text, commit_sha text, files jsonb
+        )
+        where not exists (
+            select 1 from commit_analyses existing where existing.commit_sha = a.commit_sha
+        )
+        returning commit_sha
+    )
+    select coalesce(array_agg(distinct commit_sha), '{}') into inserted_shas from inserted;
+
+    return jsonb_build_object('inserted_shas', to_jsonb(inserted_shas));
+end;
+$$;
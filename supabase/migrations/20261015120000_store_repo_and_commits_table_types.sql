@@ -0,0 +1,30 @@
+-- Read the commits payload with the commits table's own column types, so the insert keeps
+-- working when a column such as date is timestamptz rather than text.
+create or replace function store_repo_and_commits(repo jsonb, commits jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    inserted_shas text[];
+begin
+    insert into repositories (id, name, url)
+    select r.id, r.name, r.url
+    from jsonb_populate_record(null::repositories, repo) as r
+    on conflict do nothing;
+
+    if not found then
+        return jsonb_build_object('code', 'duplicate_key');
+    end if;
+
+    with inserted as (
+        insert into commits (sha, author, date, message, url, author_email, description, author_url, repo_id, files)
+        select c.sha, c.author, c.date, c.message, c.url, c.author_email, c.description, c.author_url, c.repo_id, c.files
+        from jsonb_populate_recordset(null::commits, commits) as c
+        on conflict (sha) do nothing
+        returning sha
+    )
+    select coalesce(array_agg(sha), '{}') into inserted_shas from inserted;
+
+    return jsonb_build_object('inserted_shas', to_jsonb(inserted_shas));
+end;
+$$;
@@ -0,0 +1,30 @@
+-- Read the analyses payload with the commit_analyses table's own column types, so the insert
+-- keeps working when a column such as type is an enum rather than text.
+create or replace function store_commit_analyses(analyses jsonb)
+returns jsonb
+language plpgsql
+as $$
+declare
+    inserted_shas text[];
+begin
+    perform pg_advisory_xact_lock(hashtext(sha))
+    from (
+        select distinct a->>'commit_sha' as sha
+        from jsonb_array_elements(analyses) as a
+        order by 1
+    ) as shas;
+
+    with inserted as (
+        insert into commit_analyses (title, idea, description, type, commit_sha, files)
+        select a.title, a.idea, a.description, a.type, a.commit_sha, a.files
+        from jsonb_populate_recordset(null::commit_analyses, analyses) as a
+        where not exists (
+            select 1 from commit_analyses existing where existing.commit_sha = a.commit_sha
+        )
+        returning commit_sha
+    )
+    select coalesce(array_agg(distinct commit_sha), '{}') into inserted_shas from inserted;
+
+    return jsonb_build_object('inserted_shas', to_jsonb(inserted_shas));
+end;
+$$;
@@ -0,0 +1,18 @@
+-- Declare repo_id with the commits.repo_id column type, so the comparison needs no cast and
+-- can use the index on commits.repo_id. The text-typed version is dropped first, since a
+-- different argument type would otherwise add an overload instead of replacing it.
+drop function if exists missing_shas(text, text[]);
+
+create function missing_shas(repo_id commits.repo_id%TYPE, candidates text[])
+returns text[]
+language sql
+stable
+as $$
+    select coalesce(array_agg(candidate), '{}')
+    from (
+        select unnest(candidates) as candidate
+        except
+        select sha from commits
+        where commits.repo_id = missing_shas.repo_id and sha = any(candidates)
+    ) as missing;
+$$;